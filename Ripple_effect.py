@@ -1,9 +1,20 @@
 import pygame
 import numpy as np
-import math
 import random
-
-pygame.init()
+import time
+
+from dirty_rects import DirtyRegions
+from droplet import DROP_HEIGHT, IMPACT_HEIGHT, impact_cell
+from font_cache import FontManager
+from frame_timer import FrameTimer
+from layer_cache import LayerCache, render_background
+from snapshot import SnapshotRing, read_snapshot, write_snapshot
+from simulation import Simulation
+from splash import SplashParticles
+from text_cache import TextCache
+from timestep import FixedTimestep
+from water_render import HeightMapRenderer
+from widgets import Button, InputBox, Slider
 
 # =======================
 # Configuration Constants
@@ -36,50 +47,82 @@ ENABLE_DEFORMATION = False
 # Bird's Eye View Toggle
 BIRD_EYE_VIEW = False
 
+# Push only the regions that changed to the display (full flip when more than
+# DIRTY_RECT_THRESHOLD of the screen changed)
+DIRTY_RECTS = True
+DIRTY_RECT_THRESHOLD = 0.5
+
 # -----------------------
 # Fonts and Screen Setup
 # -----------------------
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Liquid Droplet Impact Simulation")
-FONT_DEFAULT = pygame.font.SysFont("Arial", 20)
-FONT_SCALE = pygame.font.SysFont("Arial", 14)
-FONT_TITLE = pygame.font.SysFont("Arial", 24, bold=True)
-DATA_LABEL_FONT = pygame.font.SysFont("Arial", 18)
-DATA_VALUE_FONT = pygame.font.SysFont("Arial", 18, bold=True)
-DATA_UNIT_FONT = pygame.font.SysFont("Arial", 16)
-INPUT_FONT = pygame.font.SysFont("Arial", 20)
+# Nothing touches the display or the fonts until init_display(), so the
+# module can be imported without opening a window
+fonts = FontManager()  # font files are resolved once and cached on disk
+
+def init_display():
+    global screen, FONT_DEFAULT, FONT_SCALE, FONT_TITLE, DATA_LABEL_FONT, DATA_VALUE_FONT, DATA_UNIT_FONT, INPUT_FONT, FONT_MONO, FONT_ICON
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Liquid Droplet Impact Simulation")
+    FONT_DEFAULT = fonts.get("Arial", 20)
+    FONT_SCALE = fonts.get("Arial", 14)
+    FONT_TITLE = fonts.get("Arial", 24, bold=True)
+    DATA_LABEL_FONT = fonts.get("Arial", 18)
+    DATA_VALUE_FONT = fonts.get("Arial", 18, bold=True)
+    DATA_UNIT_FONT = fonts.get("Arial", 16)
+    INPUT_FONT = fonts.get("Arial", 20)
+    FONT_MONO = fonts.get("Courier New", 14)
+    FONT_ICON = fonts.get("Arial", 28, bold=True)
+    build_widgets()
+
+text_cache = TextCache()
 
 
 
 # ======================
 # Simulation Parameters (3D water surface, bird's eye view)
 # ======================
-GRID_SIZE = 120  # Number of grid points per side (adjust for performance/quality, lowered for better FPS)
-water_y = np.zeros((GRID_SIZE, GRID_SIZE), dtype=np.float32)  # displacement (height)
-water_v = np.zeros((GRID_SIZE, GRID_SIZE), dtype=np.float32)  # velocity
-water_a = np.zeros((GRID_SIZE, GRID_SIZE), dtype=np.float32)  # acceleration
-
-# Physics parameters
-spring_k = 0.04  # spring constant
-damping = 0.985  # damping factor (viscosity)
-spread = 0.15    # how much neighboring points affect each other
-gravity = 0.5
-drop_mass = 1.0
-drop_radius = 18.0
-default_drop_radius = 18.0
-drop_height = 200.0
-drop_fall_speed = 8.0
-drop_y = drop_height
-drop_x = WIDTH // 3
-drop_vy = 0.0
-drop_angle = 45.0
+GRID_SIZE = 120  # Number of grid points per side (adjust for performance/quality)
+GRID_WORKERS = 1  # Threads stepping the grid in row bands (only pays off for very large grids)
+GRID_SOLVER = "stencil"  # "spectral": FFT propagator, the grid edges wrap around (periodic)
+GRID_EPSILON = 1e-3  # cells moving less than this are no longer stepped (0: step every disturbed cell)
+GRID_DTYPE = np.float32  # grid storage: np.float64, np.float32 or np.float16 (python wave_grid.py compares them)
+SLEEP_ENERGY = 1e-6  # below this surface energy the water snaps flat and stops stepping (0: never)
+
+# Scaling factor for kinetic energy transfer to water (tune for visible ripples)
+RIPPLE_ENERGY_SCALE = 0.2
+
+# Water grid, droplet, rain and the physics parameters (sim.spring_k,
+# sim.damping, sim.spread, sim.gravity...) all live on one Simulation
+sim = Simulation(GRID_SIZE, spring_k=0.04, damping=0.985, spread=0.15, gravity=0.5, fall_speed=8.0,
+                 energy_scale=RIPPLE_ENERGY_SCALE, solver=GRID_SOLVER, workers=GRID_WORKERS, epsilon=GRID_EPSILON,
+                 dtype=GRID_DTYPE, sleep_energy=SLEEP_ENERGY)
+water_y = sim.water_y  # displacement (height)
+water_v = sim.water_v  # velocity
+water_a = sim.water_a  # acceleration
+previous_y = water_y.copy()   # height after the previous physics step
+display_y = water_y.copy()    # height interpolated for drawing
+water_frame = 0               # bumped whenever display_y changes, keys the cached water image
+
+# Physics runs at a fixed rate, independent of the frame rate
+PHYSICS_HZ = 120
+MAX_SUBSTEPS = 10  # per rendered frame, extra time is dropped
+IDLE_FPS = 30      # frame rate while nothing on screen is moving
+
+# Snapshots (F5: save, F9: load, Left arrow: rewind)
+SNAPSHOT_PATH = "ripple_effect.rsnap"
+REWIND_INTERVAL = 30  # physics steps between rewind snapshots
+REWIND_DEPTH = 120    # rewind snapshots kept in memory
+height_map = HeightMapRenderer(GRID_SIZE)
 proximity_threshold = 50.0
 splash_particle_variation = 1.5
 splash_particle_speed = 3.5
 splash_particle_count = 30
 
-# Scaling factor for kinetic energy transfer to water (tune for visible ripples)
-RIPPLE_ENERGY_SCALE = 0.2
+# Rain (T: toggle): drops per second at random cells, on top of the Start drop
+RAIN_RATE = 200.0
+RAIN_SPLASH_PARTICLES = 4
+sim.rain_radius = (2.0, 6.0)
 
 # UI/UX parameters
 SLIDER_COLOR = (120, 180, 255)
@@ -94,16 +137,14 @@ SLIDER_KNOB_RADIUS = 10
 
 # UI Elements and State
 # =====================
-BTTN_X = 1020 + 30  # inside panel, with padding
-BTTN_Y0 = 520        # below data fields
-BTTN_SPACING = 50
+# Buttons stacked on the right
+BTTN_X = WIDTH - 320 - 40
+BTTN_Y0 = 80
+BTTN_SPACING = 38 + 18
 BUTTON_WIDTH, BUTTON_HEIGHT = 320, 38
-toggle_view_button = pygame.Rect(BTTN_X, BTTN_Y0 + 0*BTTN_SPACING, BUTTON_WIDTH, BUTTON_HEIGHT)
-start_button = pygame.Rect(BTTN_X, BTTN_Y0 + 1*BTTN_SPACING, BUTTON_WIDTH, BUTTON_HEIGHT)
-reset_button = pygame.Rect(BTTN_X, BTTN_Y0 + 2*BTTN_SPACING, BUTTON_WIDTH, BUTTON_HEIGHT)
-restart_button = pygame.Rect(BTTN_X, BTTN_Y0 + 3*BTTN_SPACING, BUTTON_WIDTH, BUTTON_HEIGHT)
-pause_button = pygame.Rect(BTTN_X, BTTN_Y0 + 4*BTTN_SPACING, BUTTON_WIDTH, BUTTON_HEIGHT)
-unpause_button = pygame.Rect(BTTN_X, BTTN_Y0 + 5*BTTN_SPACING, BUTTON_WIDTH, BUTTON_HEIGHT)
+def make_button(row, label, color, hover_color):
+    rect = (BTTN_X, BTTN_Y0 + row*BTTN_SPACING, BUTTON_WIDTH, BUTTON_HEIGHT)
+    return Button(rect, label, FONT_DEFAULT, color, hover_color, TEXT_COLOR)
 BIRD_EYE_VIEW = True  # Start in top view
 
 # Minimize state for info panel
@@ -112,25 +153,37 @@ panel_minimized = False
 panel_min_btn_rect = pygame.Rect(380-36, 28, 28, 28)
 
 INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT = 80, 30
-angle_input_box = pygame.Rect(1120, 100, INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT)
-size_input_box = pygame.Rect(1120, 140, INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT)
 active_input_box = None
-angle_input_text = ""
-size_input_text = ""
 
-simulation_started = False
-simulation_paused = False
-drop_hit_water = False
+# Sliders in the panel, placed below the data fields every frame
+def make_slider(label, minv, maxv, inverted=False):
+    return Slider(label, minv, maxv, FONT_DEFAULT, SLIDER_WIDTH, SLIDER_HEIGHT, SLIDER_KNOB_RADIUS,
+                  SLIDER_BG, SLIDER_COLOR, SLIDER_KNOB, TEXT_COLOR, inverted)
+
+def build_widgets():
+    # Widgets render with the fonts, so they are built by init_display()
+    global toggle_view_button, start_button, reset_button, restart_button, pause_button, unpause_button, buttons
+    global angle_input_box, size_input_box, gravity_slider, damping_slider, drop_size_slider, sliders
+    toggle_view_button = make_button(0, "Top/Side View", BUTTON_COLOR, BUTTON_HOVER_COLOR)
+    start_button = make_button(1, "Start", BUTTON_COLOR, BUTTON_HOVER_COLOR)
+    reset_button = make_button(2, "Reset", RESET_COLOR, RESET_HOVER_COLOR)
+    restart_button = make_button(3, "Restart", RESTART_COLOR, RESTART_HOVER_COLOR)
+    pause_button = make_button(4, "Pause", PAUSE_COLOR, PAUSE_HOVER_COLOR)
+    unpause_button = make_button(5, "Unpause", UNPAUSE_COLOR, UNPAUSE_HOVER_COLOR)
+    buttons = [toggle_view_button, start_button, reset_button, restart_button, pause_button, unpause_button]
+    angle_input_box = InputBox((140, 100, INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT), "0-90", INPUT_FONT, TEXT_COLOR, (150,150,150),
+                               INPUT_BOX_COLOR, INPUT_BOX_ACTIVE_COLOR)
+    size_input_box = InputBox((140, 140, INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT), "5-100", INPUT_FONT, TEXT_COLOR, (150,150,150),
+                              INPUT_BOX_COLOR, INPUT_BOX_ACTIVE_COLOR)
+    gravity_slider = make_slider("Gravity", 0.1, 2.0)
+    # Viscosity slider (inverted: left = high viscosity, right = low viscosity)
+    damping_slider = make_slider("Damping", 0.90, 0.999, inverted=True)
+    drop_size_slider = make_slider("Drop Size", 5, 100)
+    sliders = [gravity_slider, damping_slider, drop_size_slider]
 
-# 3D drop position (x, z, y)
-drop_x = GRID_SIZE // 2
-drop_z = GRID_SIZE // 2
-drop_y = drop_height
-drop_angle = 45.0
-ripple_time = 0.0
-initial_drop_x_ripple_origin = drop_x
+simulation_paused = False
 
-splash_particles = []
+splash_particles = SplashParticles(floor_y=HEIGHT // 2)
 
 # For bird's eye view ripples (now handled by 2D grid)
 circle_ripples = []
@@ -139,44 +192,43 @@ circle_ripples = []
 # Helper Functions
 # ============
 def reset_simulation():
-    global drop_hit_water, drop_y, drop_vy, drop_fall_speed, water_y, water_v, water_a, drop_x, drop_z, drop_radius, splash_particles, angle_input_text, size_input_text
-    drop_hit_water = False
-    drop_y = drop_height
-    drop_vy = 0.0
-    drop_fall_speed = 8.0
-    water_y.fill(0.0)
-    water_v.fill(0.0)
-    water_a.fill(0.0)
-    drop_x = GRID_SIZE // 2
-    drop_z = GRID_SIZE // 2
-    # Do not reset drop_radius here; keep user-set value
-    splash_particles = []
-    angle_input_text = ""
-    size_input_text = ""
+    # Keeps the user-set drop radius and angle
+    global water_frame
+    sim.reset()
+    previous_y.fill(0.0)
+    water_frame += 1
+    splash_particles.clear()
+    angle_input_box.text = ""
+    size_input_box.text = ""
 
 def draw_text(text, font, color, surface, x, y):
-    text_obj = font.render(text, True, color)
+    text_obj = text_cache.render(font, text, True, color)
     surface.blit(text_obj, (x, y))
 
-def display_data_panel(screen):
-    # Draw panel background, border, and shadow (move to left)
-    global panel_minimized
-    panel_rect = (20, 20, 380, 760)
+def build_panel_chrome():
+    # Panel background, border, shadow, title and minimize button (static per minimize state)
+    panel_rect = (0, 0, 380, 760)
+    chrome = pygame.Surface((panel_rect[2] + 6, panel_rect[3] + 8), pygame.SRCALPHA)
     shadow_rect = (panel_rect[0]+6, panel_rect[1]+8, panel_rect[2], panel_rect[3])
-    pygame.draw.rect(screen, (30,30,40,120), shadow_rect, border_radius=18)
-    pygame.draw.rect(screen, PANEL_BG_COLOR, panel_rect, border_radius=16)
-    pygame.draw.rect(screen, PANEL_BORDER_COLOR, panel_rect, 2, border_radius=16)
-    draw_text("Simulation Data", FONT_TITLE, TEXT_COLOR, screen, 40, 30)
+    pygame.draw.rect(chrome, (30,30,40), shadow_rect, border_radius=18)
+    pygame.draw.rect(chrome, PANEL_BG_COLOR, panel_rect, border_radius=16)
+    pygame.draw.rect(chrome, PANEL_BORDER_COLOR, panel_rect, 2, border_radius=16)
+    draw_text("Simulation Data", FONT_TITLE, TEXT_COLOR, chrome, 20, 10)
     # Draw minimize/collapse button (top-right)
     btn_rect = pygame.Rect(panel_rect[0]+panel_rect[2]-36, panel_rect[1]+8, 28, 28)
-    pygame.draw.rect(screen, (80,80,100), btn_rect, border_radius=8)
+    pygame.draw.rect(chrome, (80,80,100), btn_rect, border_radius=8)
     # Draw icon: '-' if open, '+' if minimized
     icon = '-' if not panel_minimized else '+'
     icon_color = (220,220,220)
-    icon_font = pygame.font.SysFont("Arial", 28, bold=True)
-    icon_surf = icon_font.render(icon, True, icon_color)
+    icon_surf = text_cache.render(FONT_ICON, icon, True, icon_color)
     icon_rect = icon_surf.get_rect(center=btn_rect.center)
-    screen.blit(icon_surf, icon_rect)
+    chrome.blit(icon_surf, icon_rect)
+    return chrome
+
+def display_data_panel(screen):
+    # Draw panel background, border, and shadow (move to left)
+    global panel_minimized
+    screen.blit(layers.get("panel", panel_minimized, build_panel_chrome), (20, 20))
     # If minimized, return early (no controls/data)
     if panel_minimized:
         return 20+40  # Just enough for spacing below the button
@@ -186,47 +238,25 @@ def display_data_panel(screen):
     draw_text("Drop Size:", DATA_LABEL_FONT, TEXT_COLOR, screen, 40, 145)
     draw_text("(With reference to x-axis)", DATA_LABEL_FONT, TEXT_COLOR, screen, 230, 105)
     draw_text("(Range 0 to 100)", DATA_LABEL_FONT, TEXT_COLOR, screen, 230, 145)
-    # Move input boxes to left
-    angle_box_left = 140
-    size_box_left = 140
-    angle_input_box.x = angle_box_left
-    size_input_box.x = size_box_left
-    # Draw input boxes with placeholder if empty
-    if active_input_box == angle_input_box:
-        pygame.draw.rect(screen, INPUT_BOX_ACTIVE_COLOR, angle_input_box, 2, border_radius=4)
-    else:
-        pygame.draw.rect(screen, INPUT_BOX_COLOR, angle_input_box, 2, border_radius=4)
-    if active_input_box == size_input_box:
-        pygame.draw.rect(screen, INPUT_BOX_ACTIVE_COLOR, size_input_box, 2, border_radius=4)
-    else:
-        pygame.draw.rect(screen, INPUT_BOX_COLOR, size_input_box, 2, border_radius=4)
-    # Show placeholder if empty
-    if angle_input_text:
-        angle_surface = INPUT_FONT.render(angle_input_text, True, TEXT_COLOR)
-    else:
-        angle_surface = INPUT_FONT.render("0-90", True, (150,150,150))
-    if size_input_text:
-        size_surface = INPUT_FONT.render(size_input_text, True, TEXT_COLOR)
-    else:
-        size_surface = INPUT_FONT.render("5-100", True, (150,150,150))
-    screen.blit(angle_surface, (angle_input_box.x + 5, angle_input_box.y + 5))
-    screen.blit(size_surface, (size_input_box.x + 5, size_input_box.y + 5))
+    # Input boxes (placeholder shown while empty)
+    angle_input_box.draw(screen, active_input_box is angle_input_box)
+    size_input_box.draw(screen, active_input_box is size_input_box)
 
     # Data grouping for display
     data_groups = [
         ("Droplet", [
-            ("Drop Y", f"{drop_y:.2f}", "px"),
-            ("Drop X", f"{drop_x:.2f}", "px"),
-            ("Radius", f"{drop_radius:.2f}", "px"),
-            ("Angle", f"{drop_angle:.2f}", "degrees"),
-            ("Velocity Y", f"{drop_vy:.2f}", "px/frame"),
+            ("Drop Y", f"{sim.drop_y:.2f}", "px"),
+            ("Drop X", f"{sim.drop_x:.2f}", "px"),
+            ("Radius", f"{sim.drop_radius:.2f}", "px"),
+            ("Angle", f"{sim.drop_angle:.2f}", "degrees"),
+            ("Velocity Y", f"{sim.drop_vy:.2f}", "px/frame"),
         ]),
         ("Water Surface", [
             ("Grid Size", f"{GRID_SIZE}x{GRID_SIZE}", ""),
-            ("Spring k", f"{spring_k:.3f}", ""),
-            ("Damping", f"{damping:.3f}", ""),
-            ("Spread", f"{spread:.3f}", ""),
-            ("Gravity", f"{gravity:.2f}", ""),
+            ("Spring k", f"{sim.spring_k:.3f}", ""),
+            ("Damping", f"{sim.damping:.3f}", ""),
+            ("Spread", f"{sim.spread:.3f}", ""),
+            ("Gravity", f"{sim.gravity:.2f}", ""),
         ]),
         ("Splash", [
             ("Particle Speed", f"{splash_particle_speed:.2f}", "px/s"),
@@ -258,42 +288,40 @@ def draw_scale():
     for i in range(1, 11):
         y_pos = HEIGHT - (i * (HEIGHT // 10))
         pygame.draw.line(screen, TEXT_COLOR, (50, y_pos), (70, y_pos), 2)
-        scale_text = FONT_SCALE.render(f"{i}", True, TEXT_COLOR)
+        scale_text = text_cache.render(FONT_SCALE, f"{i}", True, TEXT_COLOR)
         screen.blit(scale_text, (20, y_pos - 8))
 
 def create_splash(drop_x_val, drop_y_val, num_particles=splash_particle_count):
-    for _ in range(num_particles):
-        angle = np.random.uniform(0, 2 * np.pi)
-        speed = np.random.uniform(splash_particle_speed * 0.7 * splash_particle_variation,
-                                  splash_particle_speed * 1.3 * splash_particle_variation)
-        lifetime = np.random.uniform(0.6, 1.6)
-        size = np.random.uniform(2, 6)
-        particle = {
-            "x": drop_x_val + np.random.uniform(-drop_radius / 2, drop_radius / 2),
-            "y": drop_y_val + np.random.uniform(-drop_radius / 2, drop_radius / 2),
-            "vx": speed * np.cos(angle),
-            "vy": -speed * np.sin(angle),
-            "life": lifetime,
-            "size": size
-        }
-        splash_particles.append(particle)
+    splash_particles.spawn(drop_x_val, drop_y_val, num_particles, splash_particle_speed, splash_particle_variation, sim.drop_radius)
 
 def update_splash_particles():
-    for particle in splash_particles[:]:
-        particle["x"] += particle["vx"]
-        particle["y"] += particle["vy"]
-        particle["vy"] += 0.1
-        if particle["y"] > HEIGHT // 2 and particle["vy"] > 0:
-            particle["vy"] *= -0.4
-        particle["life"] -= 0.04
-        if particle["life"] <= 0:
-            splash_particles.remove(particle)
+    splash_particles.update()
 
 def draw_splash_particles():
-    for particle in splash_particles:
-        alpha = max(0, int(255 * (particle["life"] / 1.6)))
-        color = (DROP_COLOR[0], DROP_COLOR[1], DROP_COLOR[2], alpha)
-        pygame.draw.circle(screen, color, (int(particle["x"]), int(particle["y"])), int(particle["size"]))
+    splash_particles.draw(screen, DROP_COLOR)
+
+def grid_to_screen(x, z):
+    # Top-view screen position of grid cell (x, z), same offsets as draw_drop
+    sim_width = 700
+    if panel_minimized:
+        offset_x = (WIDTH - sim_width) // 2
+    else:
+        offset_x = 20 + 380 + ((WIDTH - (20 + 380) - sim_width) // 2)
+    offset_y = 80
+    return offset_x + int(x * sim_width / GRID_SIZE), offset_y + int(z * sim_width / GRID_SIZE)
+
+def draw_rain():
+    # Drops in flight; returns the area drawn (None when there are none)
+    dirty = None
+    drops = sim.drops
+    n = len(drops)
+    for x, z, y, r in zip(drops.x[:n].tolist(), drops.z[:n].tolist(), drops.y[:n].tolist(), drops.radius[:n].tolist()):
+        sx, sz = grid_to_screen(x, z)
+        if not BIRD_EYE_VIEW:
+            sz = 500 + int(y - IMPACT_HEIGHT)
+        rect = pygame.draw.circle(screen, DROP_COLOR, (sx, sz), max(1, int(r)))
+        dirty = rect if dirty is None else dirty.union(rect)
+    return dirty
 
 def draw_water_surface():
     # Center the simulation horizontally, allow for info panel width if visible
@@ -310,56 +338,50 @@ def draw_water_surface():
     if BIRD_EYE_VIEW:
         # 3D: Render as a shaded height map (bird's eye view) with specular highlight
         cell_size = sim_width // GRID_SIZE
-        light_pos = (GRID_SIZE // 2, GRID_SIZE // 2)
-        for i in range(GRID_SIZE - 1):
-            for j in range(GRID_SIZE - 1):
-                h = water_y[i, j]
-                # Color by height (blue for low, white for high)
-                base = 80 + int(80 * (h / 30.0))
-                base = max(0, min(255, base))
-                color = [base, base, 200 + base // 4]
-                # Fake specular highlight (bright spot follows highest slope facing 'light')
-                if 1 <= i < GRID_SIZE-2 and 1 <= j < GRID_SIZE-2:
-                    dx = (water_y[i+1, j] - water_y[i-1, j]) * 0.5
-                    dz = (water_y[i, j+1] - water_y[i, j-1]) * 0.5
-                    # Light direction from above
-                    dot = max(0, min(1, 0.5 - 0.5 * (dx + dz)))
-                    spec = int(80 * dot)
-                    color[0] = min(255, color[0] + spec)
-                    color[1] = min(255, color[1] + spec)
-                    color[2] = min(255, color[2] + spec)
-                x = offset_x + i * cell_size
-                y = offset_y + j * cell_size
-                pygame.draw.rect(screen, color, (x, y, cell_size, cell_size))
+        if cell_size > 0:
+            map_size = (GRID_SIZE - 1) * cell_size
+        else:
+            map_size = sim_width
+        # Recoloured only when the heights changed, otherwise the last frame's image is reused
+        image = layers.get("water_top", (map_size, water_frame),
+                           lambda: height_map.render(display_y, (map_size, map_size)))
+        dirty = screen.blit(image, (offset_x, offset_y))
 
         # Draw animated impact ring if recent impact
-        if drop_hit_water and ripple_time < 20:
-            impact_x = offset_x + int(drop_x * sim_width / GRID_SIZE)
-            impact_y = offset_y + int(drop_z * sim_width / GRID_SIZE)
-            ring_radius = int(drop_radius * 1.2 + ripple_time * 3)
-            alpha = max(0, 180 - ripple_time * 8)
+        if sim.drop_hit_water and sim.ripple_time < 20:
+            impact_x = offset_x + int(sim.drop_x * sim_width / GRID_SIZE)
+            impact_y = offset_y + int(sim.drop_z * sim_width / GRID_SIZE)
+            ring_radius = int(sim.drop_radius * 1.2 + sim.ripple_time * 3)
+            alpha = max(0, 180 - sim.ripple_time * 8)
             ring_surface = pygame.Surface((ring_radius*2, ring_radius*2), pygame.SRCALPHA)
             pygame.draw.circle(ring_surface, (255,255,255,alpha), (ring_radius, ring_radius), ring_radius, 4)
-            screen.blit(ring_surface, (impact_x - ring_radius, impact_y - ring_radius))
+            dirty.union_ip(screen.blit(ring_surface, (impact_x - ring_radius, impact_y - ring_radius)))
+        return dirty
     else:
         # Side view: show a horizontal slice through the grid at the drop's Z position, or average a band for smoother ripples
-        band = 2
-        slice_j = int(drop_z)
-        points = []
-        for i in range(GRID_SIZE):
-            # Average over a small band for smoother ripples
-            avg_h = np.mean(water_y[i, max(0, slice_j-band):min(GRID_SIZE, slice_j+band+1)])
-            x = offset_x + int(i * sim_width / GRID_SIZE)
-            y = 500 + int(avg_h)
-            points.append((x, y))
+        slice_j = int(sim.drop_z)
+        points = layers.get("water_side", (offset_x, slice_j, water_frame),
+                            lambda: side_profile(offset_x, slice_j, sim_width))
         # Draw filled water
         water_poly = points + [(offset_x + sim_width, 800), (offset_x, 800)]
-        pygame.draw.polygon(screen, WATER_COLOR_SURFACE, water_poly)
+        dirty = pygame.draw.polygon(screen, WATER_COLOR_SURFACE, water_poly)
         # Draw the surface line
-        pygame.draw.aalines(screen, (180, 220, 255), False, points, 2)
+        dirty.union_ip(pygame.draw.aalines(screen, (180, 220, 255), False, points, 2))
+        return dirty
+
+def side_profile(offset_x, slice_j, sim_width):
+    band = 2
+    points = []
+    for i in range(GRID_SIZE):
+        # Average over a small band for smoother ripples
+        avg_h = np.mean(display_y[i, max(0, slice_j-band):min(GRID_SIZE, slice_j+band+1)])
+        x = offset_x + int(i * sim_width / GRID_SIZE)
+        y = 500 + int(avg_h)
+        points.append((x, y))
+    return points
 
 def draw_drop():
-    if simulation_started and not drop_hit_water:
+    if sim.started and not sim.drop_hit_water:
         drop_color = (0, 180, 230)
         # Use same centering logic as draw_water_surface
         global panel_minimized
@@ -370,23 +392,54 @@ def draw_drop():
             offset_x = 20 + 380 + ((WIDTH - (20 + 380) - sim_width) // 2)
         offset_y = 80
         if BIRD_EYE_VIEW:
-            x = offset_x + int(drop_x * sim_width / GRID_SIZE)
-            z = offset_y + int(drop_z * sim_width / GRID_SIZE)
-            pygame.draw.circle(screen, drop_color, (x, z), int(drop_radius))
+            x = offset_x + int(sim.drop_x * sim_width / GRID_SIZE)
+            z = offset_y + int(sim.drop_z * sim_width / GRID_SIZE)
+            dirty = pygame.draw.circle(screen, drop_color, (x, z), int(sim.drop_radius))
             # Optional: draw shadow on water
-            pygame.draw.circle(screen, (100, 120, 180, 80), (x, z), int(drop_radius * 1.1), 1)
+            return dirty.union(pygame.draw.circle(screen, (100, 120, 180, 80), (x, z), int(sim.drop_radius * 1.1), 1))
         else:
             # Side view: show drop as a circle above the current cross-section
-            x = offset_x + int(drop_x * sim_width / GRID_SIZE)
-            y = 500 + int(drop_y - drop_height)
-            pygame.draw.circle(screen, drop_color, (x, y), int(drop_radius))
+            x = offset_x + int(sim.drop_x * sim_width / GRID_SIZE)
+            y = 500 + int(sim.drop_y - DROP_HEIGHT)
+            return pygame.draw.circle(screen, drop_color, (x, y), int(sim.drop_radius))
+
+def build_background():
+    return render_background((WIDTH, HEIGHT), BG_COLOR, WATER_COLOR_DEEP, WATER_COLOR_SURFACE)
+
+layers = LayerCache()
+
+def capture_state():
+    # Everything needed to continue the run later: the simulation plus the splash particles
+    arrays, state = sim.snapshot()
+    arrays.update(splash_particles.snapshot())
+    return arrays, state
+
+def restore_state(arrays, state):
+    global water_frame
+    sim.restore(arrays, state)
+    np.copyto(previous_y, water_y)
+    water_frame += 1
+    if "particle_x" in arrays:
+        splash_particles.restore(arrays)
+
+def step_physics():
+    # One fixed physics step: droplet, rain and water grid, then the splash particles
+    hit_before = sim.drop_hit_water
+    landed = sim.step_drops()
+    if not hit_before and sim.drop_hit_water:
+        # Visual splash where the Start drop landed (it comes first)
+        x, z, r = landed.pop(0)
+        create_splash(*grid_to_screen(x, z))
+    for x, z, r in landed:
+        splash_particles.spawn(*grid_to_screen(x, z), RAIN_SPLASH_PARTICLES, splash_particle_speed,
+                               splash_particle_variation, r)
+    frame_timer.mark("droplet")
+
+    sim.step_grid()
+    frame_timer.mark("grid")
 
-def draw_lighting():
-    light_pos = (WIDTH // 4, HEIGHT // 4)
-    for x in range(WIDTH):
-        distance = np.sqrt((x - light_pos[0]) ** 2 + (HEIGHT // 2 - light_pos[1]) ** 2)
-        light_intensity = max(0, min(20, int(200 / (distance + 100))))
-        pygame.draw.line(screen, (light_intensity, light_intensity, light_intensity, 30), (x, HEIGHT // 2), (x, HEIGHT))
+    update_splash_particles()
+    frame_timer.mark("particles")
 
 # ====================
 # Main Simulation Loop
@@ -394,240 +447,202 @@ def draw_lighting():
 # ====================
 # Main Simulation Loop
 # ====================
-running = True
-clock = pygame.time.Clock()
-
-while running:
-    screen.fill(BG_COLOR)
-
-    # ------------------
-    # Event Handling
-    # ------------------
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = event.pos
-            # Minimize/collapse info panel
-            if 20 <= mouse_pos[0] <= 20+380 and 20 <= mouse_pos[1] <= 20+40:
-                btn_rect = pygame.Rect(20+380-36, 20+8, 28, 28)
-                if btn_rect.collidepoint(mouse_pos):
-                    panel_minimized = not panel_minimized
-                    continue
-            if start_button.collidepoint(mouse_pos):
-                try:
-                    # Input validation
-                    if angle_input_text:
-                        val = float(angle_input_text)
-                        drop_angle = max(0, min(90, val))
-                    if size_input_text:
-                        val = float(size_input_text)
-                        drop_radius = max(5, min(100, val))
-                    # Calculate initial drop_x, drop_z based on angle and size
-                    # Angle 0 = center, 90 = right edge
-                    r = (GRID_SIZE // 2) - int((drop_radius / 100) * (GRID_SIZE // 2 - 5))
-                    drop_x = int((GRID_SIZE // 2) + r * math.cos(math.radians(drop_angle)))
-                    drop_z = int((GRID_SIZE // 2) + r * math.sin(math.radians(drop_angle)))
+# Per-phase frame timings (F3: toggle overlay, F4: dump to CSV)
+frame_timer = FrameTimer(["events", "background", "droplet", "grid", "water", "panel", "ui", "particles", "display"])
+
+def main():
+    global panel_minimized, simulation_paused, BIRD_EYE_VIEW, active_input_box, water_frame
+    init_display()
+    running = True
+    clock = pygame.time.Clock()
+    physics_clock = FixedTimestep(PHYSICS_HZ, MAX_SUBSTEPS)
+    frame_time = physics_clock.dt
+    show_timings = False
+    rewind = SnapshotRing(REWIND_DEPTH)
+    physics_steps = 0
+    dirty_regions = DirtyRegions((WIDTH, HEIGHT), DIRTY_RECT_THRESHOLD, enabled=DIRTY_RECTS)
+
+    while running:
+        frame_timer.start_frame()
+        frame_before = water_frame  # resets and snapshot loads below bump it too
+        was_asleep = sim.asleep
+        # ------------------
+        # Event Handling
+        # ------------------
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty_regions.invalidate()
+
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                mouse_pos = event.pos
+                # Minimize/collapse info panel
+                if 20 <= mouse_pos[0] <= 20+380 and 20 <= mouse_pos[1] <= 20+40:
+                    btn_rect = pygame.Rect(20+380-36, 20+8, 28, 28)
+                    if btn_rect.collidepoint(mouse_pos):
+                        panel_minimized = not panel_minimized
+                        continue
+                if start_button.collidepoint(mouse_pos):
+                    try:
+                        # Input validation
+                        if angle_input_box.text:
+                            val = float(angle_input_box.text)
+                            sim.drop_angle = max(0, min(90, val))
+                        if size_input_box.text:
+                            val = float(size_input_box.text)
+                            sim.drop_radius = max(5, min(100, val))
+                        # Calculate initial drop_x, drop_z based on angle and size
+                        # Angle 0 = center, 90 = right edge
+                        sim.drop_x, sim.drop_z = impact_cell(GRID_SIZE, sim.drop_angle, sim.drop_radius)
+                        reset_simulation()
+                        sim.started = True
+                    except ValueError:
+                        print("Invalid input. Please enter numbers for angle and size.")
+                elif reset_button.collidepoint(mouse_pos):
                     reset_simulation()
-                    simulation_started = True
-                except ValueError:
-                    print("Invalid input. Please enter numbers for angle and size.")
-            elif reset_button.collidepoint(mouse_pos):
-                reset_simulation()
-                simulation_started = False
-            elif restart_button.collidepoint(mouse_pos):
-                reset_simulation()
-                simulation_started = True
-            elif pause_button.collidepoint(mouse_pos):
-                simulation_paused = True
-            elif unpause_button.collidepoint(mouse_pos):
-                simulation_paused = False
-            elif toggle_view_button.collidepoint(mouse_pos):
-                BIRD_EYE_VIEW = not BIRD_EYE_VIEW
-            elif not panel_minimized and angle_input_box.collidepoint(mouse_pos):
-                active_input_box = angle_input_box
-            elif not panel_minimized and size_input_box.collidepoint(mouse_pos):
-                active_input_box = size_input_box
-            else:
-                active_input_box = None
-
-        elif event.type == pygame.KEYDOWN:
-            # Keyboard shortcuts
-            if event.key == pygame.K_SPACE:
-                simulation_started = not simulation_started
-            elif event.key == pygame.K_r:
-                reset_simulation()
-                simulation_started = False
-            elif event.key == pygame.K_p:
-                simulation_paused = not simulation_paused
-            elif event.key == pygame.K_v:
-                BIRD_EYE_VIEW = not BIRD_EYE_VIEW
-
-            if active_input_box == angle_input_box:
-                if event.key == pygame.K_BACKSPACE:
-                    angle_input_text = angle_input_text[:-1]
-                elif event.unicode.isdigit() or event.unicode == '.':
-                    angle_input_text += event.unicode
-            elif active_input_box == size_input_box:
-                if event.key == pygame.K_BACKSPACE:
-                    size_input_text = size_input_text[:-1]
-                elif event.unicode.isdigit() or event.unicode == '.':
-                    size_input_text += event.unicode
-
-    # ------------------
-    # Drawing Background
-    # ------------------
-    for y in range(HEIGHT):
-        intensity = int(WATER_COLOR_DEEP[2] + (WATER_COLOR_SURFACE[2] - WATER_COLOR_DEEP[2]) * (y / HEIGHT))
-        pygame.draw.line(screen, (WATER_COLOR_DEEP[0], WATER_COLOR_DEEP[1], intensity), (0, y), (WIDTH, y))
-
-
-    # --- Droplet physics (3D) ---
-    if simulation_started and not drop_hit_water:
-        drop_vy = drop_fall_speed
-        drop_y += drop_vy
-        # Drop falls straight down (for simplicity)
-        if drop_y >= 40:  # Impact height (tune for grid scale)
-            drop_hit_water = True
-            # Energy transfer: amplitude proportional to drop's kinetic energy (no normalization)
-            drop_mass_physical = (drop_radius / default_drop_radius) ** 3 * drop_mass
-            drop_kinetic_energy = 0.5 * drop_mass_physical * drop_vy ** 2
-            # Add energy to a circular region on the grid
-            for i in range(GRID_SIZE):
-                for j in range(GRID_SIZE):
-                    dx = i - drop_x
-                    dz = j - drop_z
-                    dist = math.sqrt(dx * dx + dz * dz)
-                    if dist <= drop_radius:
-                        water_v[i, j] += (1 - dist / (drop_radius + 1)) * drop_kinetic_energy * RIPPLE_ENERGY_SCALE
-            # Visual splash at impact location (use same offset_x, sim_width as draw_water_surface)
-            sim_width = 700
-            if panel_minimized:
-                offset_x = (WIDTH - sim_width) // 2
-            else:
-                offset_x = 20 + 380 + ((WIDTH - (20 + 380) - sim_width) // 2)
-            offset_y = 80
-            splash_x = offset_x + int(drop_x * sim_width / GRID_SIZE)
-            splash_y = offset_y + int(drop_z * sim_width / GRID_SIZE)
-            create_splash(splash_x, splash_y)
-    # --- FPS Counter ---
-    fps = int(clock.get_fps())
-    fps_surf = FONT_DEFAULT.render(f"FPS: {fps}", True, (255,255,0))
-    screen.blit(fps_surf, (WIDTH-120, 20))
-
-    # --- 3D Water Surface Physics (spring-mass grid) ---
-    for i in range(GRID_SIZE):
-        for j in range(GRID_SIZE):
-            center = water_y[i, j]
-            neighbors = 0
-            total = 0.0
-            for di, dj in [(-1,0),(1,0),(0,-1),(0,1)]:
-                ni, nj = i+di, j+dj
-                if 0 <= ni < GRID_SIZE and 0 <= nj < GRID_SIZE:
-                    total += water_y[ni, nj]
-                    neighbors += 1
-            force = spring_k * (-center) + spread * (total - neighbors * center)
-            water_a[i, j] = force
-    water_v += water_a
-    water_v *= damping
-    water_y += water_v
-
-
-    draw_lighting()
-    draw_water_surface()
-    draw_drop()
-    draw_scale()
-
-
-    # Draw data panel first and get y_offset for placing controls
-    controls_y = display_data_panel(screen)
-
-    # --- Modern UI Panel with Sliders ---
-    def draw_slider(x, y, value, minv, maxv, label):
-        # Draw a modern slider with shadow and rounded corners
-        slider_rect = pygame.Rect(x, y, SLIDER_WIDTH, SLIDER_HEIGHT)
-        shadow = pygame.Surface((SLIDER_WIDTH+8, SLIDER_HEIGHT+8), pygame.SRCALPHA)
-        pygame.draw.rect(shadow, (0,0,0,60), (4,4,SLIDER_WIDTH,SLIDER_HEIGHT), border_radius=8)
-        screen.blit(shadow, (x-4, y-4))
-        pygame.draw.rect(screen, SLIDER_BG, slider_rect, border_radius=8)
-        pos = int((value - minv) / (maxv - minv) * SLIDER_WIDTH)
-        pygame.draw.rect(screen, SLIDER_COLOR, (x, y, pos, SLIDER_HEIGHT), border_radius=8)
-        knob_x = x + pos
-        pygame.draw.circle(screen, SLIDER_KNOB, (knob_x, y + SLIDER_HEIGHT // 2), SLIDER_KNOB_RADIUS)
-        draw_text(f"{label}: {value:.3f}", FONT_DEFAULT, TEXT_COLOR, screen, x, y - 25)
-
-    # Place sliders and buttons immediately after the data fields
-    if not panel_minimized:
-        slider_x = 40
-        slider_y0 = controls_y + 10  # Add a little more space after data fields
-        slider_gap = 38
-        draw_slider(slider_x, slider_y0, gravity, 0.1, 2.0, "Gravity")
-        draw_slider(slider_x, slider_y0 + slider_gap, damping, 0.90, 0.999, "Damping")
-        draw_slider(slider_x, slider_y0 + 2*slider_gap, drop_radius, 5, 100, "Drop Size")
-
-    # --- Buttons on the right ---
-    button_list = [
-        (toggle_view_button, "Top/Side View"),
-        (start_button, "Start"),
-        (reset_button, "Reset"),
-        (restart_button, "Restart"),
-        (pause_button, "Pause"),
-        (unpause_button, "Unpause")
-    ]
-    button_x = WIDTH - BUTTON_WIDTH - 40
-    button_y0 = 80
-    button_gap = 18
-    for idx, (btn, label) in enumerate(button_list):
-        btn.x = button_x
-        btn.y = button_y0 + idx * (BUTTON_HEIGHT + button_gap)
-        if btn == reset_button:
-            color = RESET_COLOR if not btn.collidepoint(pygame.mouse.get_pos()) else RESET_HOVER_COLOR
-        elif btn == restart_button:
-            color = RESTART_COLOR if not btn.collidepoint(pygame.mouse.get_pos()) else RESTART_HOVER_COLOR
-        elif btn == pause_button:
-            color = PAUSE_COLOR if not btn.collidepoint(pygame.mouse.get_pos()) else PAUSE_HOVER_COLOR
-        elif btn == unpause_button:
-            color = UNPAUSE_COLOR if not btn.collidepoint(pygame.mouse.get_pos()) else UNPAUSE_HOVER_COLOR
-        else:
-            color = BUTTON_COLOR if not btn.collidepoint(pygame.mouse.get_pos()) else BUTTON_HOVER_COLOR
-        # Draw button with shadow and rounded corners
-        shadow = pygame.Surface((BUTTON_WIDTH+8, BUTTON_HEIGHT+8), pygame.SRCALPHA)
-        pygame.draw.rect(shadow, (0,0,0,60), (4,4,BUTTON_WIDTH,BUTTON_HEIGHT), border_radius=12)
-        screen.blit(shadow, (btn.x-4, btn.y-4))
-        pygame.draw.rect(screen, color, btn, border_radius=12)
-        # Center label
-        text_surf = FONT_DEFAULT.render(label, True, TEXT_COLOR)
-        text_rect = text_surf.get_rect(center=btn.center)
-        screen.blit(text_surf, text_rect)
-
-    # --- End of frame ---
-    update_splash_particles()
-    draw_splash_particles()
-    if drop_hit_water:
-        ripple_time += 1
-    else:
-        ripple_time = 0
-
-    # --- Handle slider interaction (mouse drag) ---
-    if not panel_minimized and pygame.mouse.get_pressed()[0]:
-        mx, my = pygame.mouse.get_pos()
-        # Match slider positions to left panel
-        slider_x = 40
-        slider_y0 = controls_y + 10
-        slider_gap = 38
-        # Gravity slider
-        if slider_x <= mx <= slider_x + SLIDER_WIDTH and slider_y0 <= my <= slider_y0 + SLIDER_HEIGHT:
-            gravity = 0.1 + (mx - slider_x) / SLIDER_WIDTH * (2.0 - 0.1)
-        # Viscosity slider (inverted: left = high viscosity, right = low viscosity)
-        if slider_x <= mx <= slider_x + SLIDER_WIDTH and slider_y0 + slider_gap <= my <= slider_y0 + slider_gap + SLIDER_HEIGHT:
-            damping = 0.999 - (mx - slider_x) / SLIDER_WIDTH * (0.999 - 0.90)
-        # Drop size slider
-        if slider_x <= mx <= slider_x + SLIDER_WIDTH and slider_y0 + 2*slider_gap <= my <= slider_y0 + 2*slider_gap + SLIDER_HEIGHT:
-            drop_radius = 5 + (mx - slider_x) / SLIDER_WIDTH * (100 - 5)
-
-    pygame.display.update()
-    clock.tick(120)
-
-pygame.quit()
+                    sim.started = False
+                elif restart_button.collidepoint(mouse_pos):
+                    reset_simulation()
+                    sim.started = True
+                elif pause_button.collidepoint(mouse_pos):
+                    simulation_paused = True
+                elif unpause_button.collidepoint(mouse_pos):
+                    simulation_paused = False
+                elif toggle_view_button.collidepoint(mouse_pos):
+                    BIRD_EYE_VIEW = not BIRD_EYE_VIEW
+                elif not panel_minimized and angle_input_box.collidepoint(mouse_pos):
+                    active_input_box = angle_input_box
+                elif not panel_minimized and size_input_box.collidepoint(mouse_pos):
+                    active_input_box = size_input_box
+                else:
+                    active_input_box = None
+
+            elif event.type == pygame.KEYDOWN:
+                # Keyboard shortcuts
+                if event.key == pygame.K_SPACE:
+                    sim.started = not sim.started
+                elif event.key == pygame.K_r:
+                    reset_simulation()
+                    sim.started = False
+                elif event.key == pygame.K_p:
+                    simulation_paused = not simulation_paused
+                elif event.key == pygame.K_v:
+                    BIRD_EYE_VIEW = not BIRD_EYE_VIEW
+                elif event.key == pygame.K_t:
+                    sim.rain_rate = 0.0 if sim.rain_rate else RAIN_RATE
+                elif event.key == pygame.K_F3:
+                    show_timings = not show_timings
+                elif event.key == pygame.K_F4:
+                    timings_path = time.strftime("frame_timings_%Y%m%d_%H%M%S.csv")
+                    frame_count = frame_timer.write_csv(timings_path)
+                    print(f"Wrote {frame_count} frame timings to {timings_path}")
+                elif event.key == pygame.K_F5:
+                    write_snapshot(SNAPSHOT_PATH, *capture_state())
+                    print(f"Saved snapshot to {SNAPSHOT_PATH}")
+                elif event.key == pygame.K_F9:
+                    try:
+                        restore_state(*read_snapshot(SNAPSHOT_PATH))
+                        print(f"Loaded snapshot from {SNAPSHOT_PATH}")
+                    except (OSError, ValueError) as e:
+                        print(f"Could not load snapshot: {e}")
+                elif event.key == pygame.K_LEFT:
+                    snapshot = rewind.pop()
+                    if snapshot is not None:
+                        restore_state(*snapshot)
+
+                if active_input_box is not None:
+                    active_input_box.handle_key(event)
+        frame_timer.mark("events")
+
+        # ------------------
+        # Drawing Background
+        # ------------------
+        screen.blit(layers.get("background", (WIDTH, HEIGHT), build_background), (0, 0))
+        frame_timer.mark("background")
+
+        # --- Fixed-timestep physics (interpolate the water between the last two steps) ---
+        # Nothing moves while paused, and sleeping water stays flat until the next impact
+        substeps = 0 if simulation_paused else physics_clock.advance(frame_time)
+        for n in range(substeps):
+            if n == substeps - 1:
+                np.copyto(previous_y, water_y)
+            step_physics()
+            physics_steps += 1
+            if physics_steps % REWIND_INTERVAL == 0:
+                rewind.push(*capture_state())
+        if not simulation_paused and not (was_asleep and sim.asleep):
+            water_frame += 1
+        if water_frame != frame_before:
+            physics_clock.interpolate(previous_y, water_y, out=display_y)
+        frame_timer.mark("grid")
+
+        # --- FPS Counter ---
+        fps = int(clock.get_fps())
+        fps_surf = text_cache.render(FONT_DEFAULT, f"FPS: {fps}", True, (255,255,0))
+        dirty_regions.track("fps", screen.blit(fps_surf, (WIDTH-120, 20)), fps)
+
+        dirty_regions.track("water", draw_water_surface(), (BIRD_EYE_VIEW, water_frame))
+        dirty_regions.track("drop", draw_drop())
+        dirty_regions.track("rain", draw_rain())
+        draw_scale()
+        frame_timer.mark("water")
+
+
+        # Draw data panel first and get y_offset for placing controls
+        controls_y = display_data_panel(screen)
+        panel_state = (panel_minimized, active_input_box is angle_input_box, active_input_box is size_input_box,
+                       angle_input_box.text, size_input_box.text, sim.drop_x, sim.drop_y, sim.drop_vy, sim.drop_radius,
+                       sim.drop_angle, sim.spring_k, sim.damping, sim.spread, sim.gravity)
+        frame_timer.mark("panel")
+
+        # --- Sliders, placed immediately after the data fields ---
+        if not panel_minimized:
+            for i, (slider, value) in enumerate(zip(sliders, (sim.gravity, sim.damping, sim.drop_radius))):
+                slider.place(40, controls_y + 10 + i*38)
+                slider.draw(screen, value)
+        # Panel chrome, data fields and sliders only change with the values they show
+        dirty_regions.track("panel", (20, 20, 386, 768), panel_state)
+
+        # --- Buttons on the right ---
+        mouse_pos = pygame.mouse.get_pos()
+        for btn in buttons:
+            btn.hover(mouse_pos)
+            btn.draw(screen)
+        dirty_regions.track("buttons", buttons[0].rect.unionall([btn.rect for btn in buttons[1:]]).inflate(8, 8),
+                            tuple(btn.hovered for btn in buttons))
+        frame_timer.mark("ui")
+
+        # --- End of frame ---
+        draw_splash_particles()
+        dirty_regions.track("particles", splash_particles.bounds())
+        frame_timer.mark("particles")
+
+        # --- Handle slider interaction (mouse drag) ---
+        if not panel_minimized and pygame.mouse.get_pressed()[0]:
+            # drag() is None off the track; 0.0 is a valid value
+            for slider, name in ((gravity_slider, "gravity"), (damping_slider, "damping"),
+                                 (drop_size_slider, "drop_radius")):
+                value = slider.drag(mouse_pos)
+                if value is not None:
+                    setattr(sim, name, value)
+
+        if show_timings:
+            dirty_regions.track("overlay", frame_timer.draw_overlay(screen, FONT_MONO, (WIDTH - 340, HEIGHT - 250)))
+        frame_timer.mark("ui")
+
+        dirty_regions.update()
+        frame_timer.mark("display")
+        frame_timer.end_frame()
+        # Nothing animating (still or paused water, no drops or splashes): wake up less often
+        idle = (water_frame == frame_before and not len(splash_particles) and not len(sim.drops)
+                and not (sim.started and not sim.drop_hit_water))
+        frame_time = clock.tick(IDLE_FPS if idle else 120) / 1000.0
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+# Render into an off-screen SDL surface so the benchmarks run anywhere
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from splash import SplashParticles
+from wave_grid import WaveGrid
+
+# ==========================
+# Hot path benchmark suite
+# ==========================
+# Times the physics, rendering and particle hot paths of all three
+# simulators and writes the results as JSON, so two runs (e.g. two commits)
+# can be compared with --compare.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = [120, 256, 512, 1024]
+
+
+def load_script(name, display=False):
+    # The simulators only open their window in main(), so importing them is
+    # enough; init_display() is needed for anything that draws.
+    module = importlib.import_module(name[:-3])
+    if display:
+        module.init_display()
+    return vars(module)
+
+
+def measure(func, repeat, min_time=0.05):
+    # Calibrate the number of calls per round so each round takes ~min_time
+    func()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+    return {
+        "min_ms": min(rounds) * 1000,
+        "median_ms": statistics.median(rounds) * 1000,
+        "mean_ms": statistics.fmean(rounds) * 1000,
+        "calls": number * repeat,
+    }
+
+
+def disturbed_grid(size, workers=1, dtype=np.float32, fused=True):
+    # Whole-grid stepping, so every call costs the same
+    grid = WaveGrid(size, dtype=dtype, workers=workers, track_active=False, fused=fused)
+    grid.impact(size // 2, size // 2, max(2, size // 7), 12.8)
+    grid.step(20)
+    return grid
+
+
+def bench_grid(results, sizes, workers, repeat):
+    for size in sizes:
+        grid = disturbed_grid(size)
+        results[f"grid_step[{size}]"] = measure(grid.step, repeat)
+        for name, dtype, fused in (("unfused", np.float32, False), ("float64", np.float64, True),
+                                   ("float16", np.float16, True)):
+            other = disturbed_grid(size, dtype=dtype, fused=fused)
+            results[f"grid_step[{size},{name}]"] = measure(other.step, repeat)
+        if workers > 1:
+            threaded = disturbed_grid(size, workers)
+            results[f"grid_step[{size},workers={workers}]"] = measure(threaded.step, repeat)
+            threaded.close()
+        for track in (True, False):
+            # The first steps after an impact, when only a small region moves
+            fresh = WaveGrid(size, track_active=track)
+            def first_steps():
+                fresh.reset()
+                fresh.impact(size // 2, size // 2, 18, 12.8)
+                fresh.step(30)
+            results[f"grid_first_30_steps[{size},{'active' if track else 'full'}]"] = measure(first_steps, repeat)
+        for radius in (18, 60):
+            results[f"impact_deposit[{size},r={radius}]"] = measure(
+                lambda: grid.impact(size // 2, size // 2, radius, 12.8), repeat)
+
+
+def bench_ripple_effect(results, repeat):
+    sim = load_script("Ripple_effect.py", display=True)
+    grid = disturbed_grid(sim["GRID_SIZE"])
+    sim["display_y"][:] = grid.water_y
+    sim["sim"].drop_hit_water = True
+    def redraw():
+        # A new water_frame each call, as while the water is moving
+        sim["water_frame"] += 1
+        sim["draw_water_surface"]()
+    for view, top in (("top", True), ("side", False)):
+        sim["BIRD_EYE_VIEW"] = top
+        results[f"Ripple_effect.draw_water_surface[{view}]"] = measure(redraw, repeat)
+        results[f"Ripple_effect.draw_water_surface[{view},still]"] = measure(sim["draw_water_surface"], repeat)
+
+
+def bench_legacy(results, repeat):
+    for name in ("ripple21.py", "ripple22.py"):
+        sim = load_script(name)
+        generate = sim["generate_ripple_effect"]
+        x, surface_y, amplitude = sim["drop_x"], sim["HEIGHT"] // 2, sim["ripple_amplitude"]
+        results[f"{name[:-3]}.generate_ripple_effect"] = measure(
+            lambda: generate(x, surface_y, 1.0, amplitude), repeat)
+        results[f"{name[:-3]}.generate_ripple_effect[pre_impact]"] = measure(
+            lambda: generate(x, surface_y - 20, 0.0, amplitude, pre_impact=True, ripple_width=200), repeat)
+
+
+def bench_splash(results, counts, repeat):
+    screen = pygame.display.get_surface()
+    for count in counts:
+        particles = SplashParticles(capacity=count, floor_y=screen.get_height() // 2)
+
+        def update():
+            if particles.count < count // 2:
+                particles.clear()
+                particles.spawn(700, 400, count, 3.5, 1.5, 18.0)
+            particles.update()
+
+        results[f"splash_update[{count}]"] = measure(update, repeat)
+        particles.clear()
+        particles.spawn(700, 400, count, 3.5, 1.5, 18.0)
+        for _ in range(10):
+            particles.update()
+        results[f"splash_draw[{count}]"] = measure(lambda: particles.draw(screen, (0, 180, 230)), repeat)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\n{'benchmark':52} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    for name, entry in results.items():
+        if name not in baseline:
+            continue
+        before, now = baseline[name]["min_ms"], entry["min_ms"]
+        print(f"{name:52} {before:10.4f} {now:10.4f} {now / before:7.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ripple simulators' hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="GRID_SIZE values for the grid benchmarks")
+    parser.add_argument("--particles", type=int, nargs="+", default=[30, 1000, 30000], help="splash particle counts")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="threads for the banded grid step")
+    parser.add_argument("--repeat", type=int, default=5, help="timing rounds per benchmark")
+    parser.add_argument("--only", nargs="+", choices=["grid", "render", "legacy", "splash"], help="run only these groups")
+    parser.add_argument("--output", "-o", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    groups = set(args.only or ["grid", "render", "legacy", "splash"])
+    np.random.seed(0)
+    results = {}
+    if "grid" in groups:
+        bench_grid(results, args.sizes, args.workers, args.repeat)
+    # The render group opens the simulator's (dummy) window
+    if "render" in groups:
+        bench_ripple_effect(results, args.repeat)
+    if "legacy" in groups:
+        bench_legacy(results, args.repeat)
+    if "splash" in groups:
+        if pygame.display.get_surface() is None:
+            pygame.init()
+            pygame.display.set_mode((1400, 800))
+        bench_splash(results, args.particles, args.repeat)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import pygame
+
+# =====================
+# Dirty-rectangle flips
+# =====================
+# Every frame is still composed in full on the back buffer, but only the
+# screen regions whose pixels may have changed are pushed to the display.
+# Draw phases report what they drew with track(name, rect, signature):
+#   - signature None means "assume it changed" (moving or animated content),
+#   - otherwise the region is only dirty when its rect or signature differs
+#     from last frame (e.g. a panel keyed by the values it shows).
+# A region that was drawn last frame but not this frame is dirty too, so
+# whatever it covered gets repainted. When the dirty area gets larger than
+# `threshold` of the screen, a plain full update is cheaper.
+
+
+class DirtyRegions:
+    def __init__(self, size, threshold=0.5, enabled=True):
+        self.screen_rect = pygame.Rect((0, 0), size)
+        self.threshold = threshold
+        self.enabled = enabled
+        self.previous = {}
+        self.current = {}
+        self.full = True  # first frame goes out in full
+        self.full_updates = 0
+        self.partial_updates = 0
+        self.pushed_pixels = 0
+
+    def track(self, name, rect, signature=None):
+        if rect is None:
+            return
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if name in self.current:
+            # Same region tracked twice in one frame: cover both
+            old_rect, old_signature = self.current[name]
+            rect = old_rect.union(rect) if old_rect.size != (0, 0) else rect
+            signature = None if old_signature != signature else signature
+        self.current[name] = (rect, signature)
+
+    def invalidate(self):
+        # e.g. window exposed or resized: push everything next frame
+        self.full = True
+
+    def collect(self):
+        # Rects to push this frame, or None for a full update
+        if self.full or not self.enabled:
+            return None
+        rects = []
+        for name, (rect, signature) in self.current.items():
+            old = self.previous.get(name)
+            if signature is None or old is None or old != (rect, signature):
+                rects.append(rect)
+                if old is not None and old[0] != rect:
+                    rects.append(old[0])
+        for name, (rect, _) in self.previous.items():
+            if name not in self.current:
+                rects.append(rect)
+        rects = merge_rects([r for r in rects if r.width > 0 and r.height > 0])
+        area = sum(r.width * r.height for r in rects)
+        if area > self.threshold * self.screen_rect.width * self.screen_rect.height:
+            return None
+        return rects
+
+    def update(self):
+        rects = self.collect()
+        if rects is None:
+            pygame.display.update()
+            self.full_updates += 1
+            self.pushed_pixels += self.screen_rect.width * self.screen_rect.height
+        else:
+            if rects:
+                pygame.display.update(rects)
+            self.partial_updates += 1
+            self.pushed_pixels += sum(r.width * r.height for r in rects)
+        self.previous = self.current
+        self.current = {}
+        self.full = False
+        return rects
+
+
+def merge_rects(rects):
+    # Union overlapping rects when their bounding box is no bigger than the two
+    # rects together (e.g. a rect inside another); pushing a few pixels twice
+    # is cheaper than pushing a bounding box full of unchanged ones.
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        changed = True
+        while changed:
+            changed = False
+            for i, other in enumerate(merged):
+                union = rect.union(other)
+                if rect.colliderect(other) and union.width * union.height <= rect.width * rect.height + other.width * other.height:
+                    rect = union
+                    del merged[i]
+                    changed = True
+                    break
+        merged.append(rect)
+    return merged
@@ -0,0 +1,37 @@
+import math
+
+# ==============
+# Droplet motion
+# ==============
+# Where a drop lands and how much energy it brings, shared by the
+# interactive scripts and the headless runner. Plain math only, so this
+# imports without pygame.
+
+DROP_HEIGHT = 200.0          # drop_y when the drop is released
+IMPACT_HEIGHT = 40.0         # drop_y at which the drop hits the grid
+DEFAULT_DROP_RADIUS = 18.0
+DROP_MASS = 1.0
+
+
+def impact_cell(grid_size, angle, radius):
+    # Grid cell hit by a drop of this angle and radius (Start button placement):
+    # angle 0 = center, 90 = right edge, bigger drops land closer to the center
+    r = (grid_size // 2) - int((radius / 100) * (grid_size // 2 - 5))
+    x = int((grid_size // 2) + r * math.cos(math.radians(angle)))
+    z = int((grid_size // 2) + r * math.sin(math.radians(angle)))
+    return x, z
+
+
+def impact_energy(radius, speed, energy_scale=1.0, rest_radius=DEFAULT_DROP_RADIUS, mass=DROP_MASS):
+    # Kinetic energy of the drop (mass grows with the radius cubed), scaled
+    # by energy_scale for visible ripples
+    drop_mass = (radius / rest_radius) ** 3 * mass
+    return 0.5 * drop_mass * speed ** 2 * energy_scale
+
+
+def angled_fall(x, y, angle, speed, width):
+    # One step of the side-view drop falling at `angle` from vertical,
+    # kept inside 0..width
+    y += speed * math.cos(math.radians(angle))
+    x += speed * math.sin(math.radians(angle))
+    return max(0, min(width, x)), y
@@ -0,0 +1,98 @@
+import numpy as np
+
+from droplet import DROP_HEIGHT, IMPACT_HEIGHT, impact_energy
+
+# ==================
+# Drops in flight
+# ==================
+# Any number of falling drops, kept like the splash particles: one
+# preallocated array per attribute with the live drops packed at the front.
+# update() moves every drop at once and deposits all drops that reached the
+# water in that step with a single WaveGrid.impact_many() call. rain() adds
+# drops as a Poisson process (on average `rate` per second) at random
+# cells. Positions are in grid cells; y grows as a drop falls, like
+# Ripple_effect.py's drop_y, and a drop lands once y reaches IMPACT_HEIGHT.
+# New drops start FALL_DISTANCE above that.
+
+FALL_DISTANCE = DROP_HEIGHT - IMPACT_HEIGHT
+RAIN_RADIUS_STEP = 0.5  # rain radii are rounded to this so impacts share kernels
+
+
+class DropManager:
+    def __init__(self, capacity=4096, fall_speed=8.0, energy_scale=0.2, seed=None):
+        self.capacity = capacity
+        self.fall_speed = fall_speed
+        self.energy_scale = energy_scale  # same role as RIPPLE_ENERGY_SCALE
+        self.x = np.zeros(capacity)
+        self.z = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        self.count = 0
+        self.impacts = 0  # drops landed since the last clear()
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self.impacts = 0
+
+    def snapshot(self):
+        n = self.count
+        return {"drops_x": self.x[:n], "drops_z": self.z[:n], "drops_y": self.y[:n],
+                "drops_vy": self.vy[:n], "drops_radius": self.radius[:n]}
+
+    def restore(self, arrays):
+        n = min(len(arrays["drops_x"]), self.capacity)
+        for arr, name in ((self.x, "drops_x"), (self.z, "drops_z"), (self.y, "drops_y"),
+                          (self.vy, "drops_vy"), (self.radius, "drops_radius")):
+            arr[:n] = arrays[name][:n]
+        self.count = n
+
+    def spawn(self, x, z, radius, y=IMPACT_HEIGHT - FALL_DISTANCE, vy=None):
+        # Scalars or arrays; drops beyond capacity are dropped
+        x, z, radius, y = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=np.float64))
+                                                for v in (x, z, radius, y)))
+        n = min(len(x), self.capacity - self.count)
+        if n <= 0:
+            return 0
+        s = slice(self.count, self.count + n)
+        self.x[s] = x[:n]
+        self.z[s] = z[:n]
+        self.radius[s] = radius[:n]
+        self.y[s] = y[:n]
+        self.vy[s] = self.fall_speed if vy is None else vy
+        self.count += n
+        return n
+
+    def rain(self, rate, dt, grid_size, radius_range=(2.0, 6.0)):
+        # Poisson arrivals over the next dt seconds, anywhere on the grid
+        n = int(self.rng.poisson(rate * dt))
+        if n == 0:
+            return 0
+        radius = self.rng.uniform(radius_range[0], radius_range[1], n)
+        radius = np.maximum(np.round(radius / RAIN_RADIUS_STEP) * RAIN_RADIUS_STEP, RAIN_RADIUS_STEP)
+        return self.spawn(self.rng.uniform(0, grid_size, n), self.rng.uniform(0, grid_size, n), radius)
+
+    def update(self, grid):
+        # One physics step. Returns (x, z, radius) of the drops that landed.
+        n = self.count
+        if n == 0:
+            return self.x[:0], self.z[:0], self.radius[:0]
+        y, vy = self.y[:n], self.vy[:n]
+        y += vy
+        landed = y >= IMPACT_HEIGHT
+        hits = int(np.count_nonzero(landed))
+        if hits == 0:
+            return self.x[:0], self.z[:0], self.radius[:0]
+        x, z, radius = self.x[:n][landed], self.z[:n][landed], self.radius[:n][landed]
+        grid.impact_many(x, z, radius, impact_energy(radius, vy[landed], self.energy_scale))
+        self.impacts += hits
+        alive = ~landed
+        live = n - hits
+        for arr in (self.x, self.z, self.y, self.vy, self.radius):
+            arr[:live] = arr[:n][alive]
+        self.count = live
+        return x, z, radius
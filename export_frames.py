@@ -0,0 +1,223 @@
+import argparse
+import math
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+
+# Frames are drawn into off-screen surfaces, no window is opened
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from droplet import DEFAULT_DROP_RADIUS, impact_cell
+from timestep import FixedTimestep
+
+# ==============
+# Frame export
+# ==============
+# Renders a droplet impact from Ripple_effect.py off-screen (top view, side
+# view or both side by side) at a fixed frame rate and resolution, and
+# writes the frames as numbered PNGs or one raw RGB stream. The render loop
+# only copies each frame's pixels into a bounded queue; a writer thread
+# encodes and writes them. When the writer falls behind, putting a frame
+# blocks until there is room again (backpressure), so memory stays bounded
+# and no frame is dropped.
+
+VIEWS = {"top": [True], "side": [False], "both": [True, False]}
+
+
+def encode_png(data, width, height, level=3):
+    # Minimal RGB PNG encoder. zlib releases the GIL while compressing, so
+    # encoding in the writer thread overlaps with rendering.
+    rows = np.frombuffer(data, np.uint8).reshape(height, width * 3)
+    raw = np.empty((height, width * 3 + 1), np.uint8)
+    raw[:, 0] = 0  # filter type "None" for every row
+    raw[:, 1:] = rows
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), level)) + chunk(b"IEND", b""))
+
+
+class FrameWriter:
+    # Writes RGB frames from a bounded queue on a background thread
+    def __init__(self, directory, size, fmt="png", max_queue=16, png_level=3):
+        self.directory = directory
+        self.size = size
+        self.fmt = fmt
+        self.png_level = png_level
+        self.queue = queue.Queue(max_queue)
+        self.frames = 0          # frames written
+        self.bytes_written = 0
+        self.blocked_time = 0.0  # time submit() spent waiting for the writer
+        self.blocked_frames = 0
+        self.error = None
+        os.makedirs(directory, exist_ok=True)
+        self.stream = open(os.path.join(directory, "frames.rgb"), "wb") if fmt == "raw" else None
+        self.start_time = time.perf_counter()
+        self.elapsed = 0.0
+        self.thread = threading.Thread(target=self.run, name="frame-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, data):
+        if self.error is not None:
+            raise self.error
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            start = time.perf_counter()
+            self.queue.put(data)
+            self.blocked_time += time.perf_counter() - start
+            self.blocked_frames += 1
+
+    def run(self):
+        index = 0
+        while True:
+            data = self.queue.get()
+            if data is None:
+                break
+            if self.error is not None:
+                continue  # keep draining so submit() never blocks forever
+            try:
+                if self.stream is not None:
+                    self.stream.write(data)
+                    written = len(data)
+                else:
+                    png = encode_png(data, self.size[0], self.size[1], self.png_level)
+                    with open(os.path.join(self.directory, f"frame_{index:06d}.png"), "wb") as f:
+                        f.write(png)
+                    written = len(png)
+                index += 1
+                self.frames += 1
+                self.bytes_written += written
+            except Exception as e:  # re-raised by the next submit() or close()
+                self.error = e
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        if self.stream is not None:
+            self.stream.close()
+        self.elapsed = time.perf_counter() - self.start_time
+        if self.error is not None:
+            raise self.error
+
+    def report(self):
+        rate = self.frames / self.elapsed if self.elapsed > 0 else float("inf")
+        mb = self.bytes_written / 1e6
+        return (f"{self.frames} frames, {mb:.1f} MB in {self.elapsed:.2f}s ({rate:.1f} frames/s, "
+                f"{mb / max(self.elapsed, 1e-9):.1f} MB/s); waited {self.blocked_time:.2f}s "
+                f"on the writer for {self.blocked_frames} frames")
+
+
+def parse_size(text):
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"size must be positive, got {text!r}")
+    return width, height
+
+
+def render_view(app, canvas, bird_eye_view):
+    # Background, water, drops and splash, drawn by Ripple_effect.py's own functions
+    app.BIRD_EYE_VIEW = bird_eye_view
+    canvas.blit(app.layers.get("background", (app.WIDTH, app.HEIGHT), app.build_background), (0, 0))
+    app.draw_water_surface()
+    app.draw_drop()
+    app.draw_rain()
+    app.draw_splash_particles()
+
+
+def export(app, writer, frames, fps, size, views):
+    canvas = pygame.Surface((app.WIDTH, app.HEIGHT))
+    frame = pygame.Surface((size[0] * len(views), size[1]))
+    app.screen = canvas
+    physics_clock = FixedTimestep(app.PHYSICS_HZ, math.ceil(app.PHYSICS_HZ / fps) + 1)
+    render_time = 0.0
+    for _ in range(frames):
+        start = time.perf_counter()
+        substeps = physics_clock.advance(1.0 / fps)
+        for n in range(substeps):
+            if n == substeps - 1:
+                np.copyto(app.previous_y, app.water_y)
+            app.step_physics()
+        physics_clock.interpolate(app.previous_y, app.water_y, out=app.display_y)
+        app.water_frame += 1
+        for i, view in enumerate(views):
+            render_view(app, canvas, view)
+            target = frame.subsurface((i * size[0], 0, size[0], size[1]))
+            if size == canvas.get_size():
+                target.blit(canvas, (0, 0))
+            else:
+                pygame.transform.smoothscale(canvas, size, target)
+        data = pygame.image.tobytes(frame, "RGB")
+        render_time += time.perf_counter() - start
+        writer.submit(data)
+    return render_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a droplet impact to image files without a window.")
+    parser.add_argument("--angle", type=float, default=45.0, help="drop angle in degrees (0-90)")
+    parser.add_argument("--size", type=float, default=DEFAULT_DROP_RADIUS, help="drop radius (5-100)")
+    parser.add_argument("--rain", type=float, default=0.0, help="rain drops per second on top of the drop")
+    parser.add_argument("--view", choices=sorted(VIEWS), default="top", help="view(s) to render; both = side by side")
+    parser.add_argument("--resolution", type=parse_size, default=None,
+                        help="WIDTHxHEIGHT of each view (default: the window size)")
+    parser.add_argument("--fps", type=float, default=60.0, help="frames per simulated second")
+    parser.add_argument("--frames", type=int, default=300, help="frames to render")
+    parser.add_argument("--format", choices=["png", "raw"], default="png",
+                        help="numbered PNGs or one raw RGB24 stream (frames.rgb)")
+    parser.add_argument("--png-level", type=int, default=3, help="PNG compression level (0-9)")
+    parser.add_argument("--queue", type=int, default=16, help="frames buffered for the writer thread")
+    parser.add_argument("--quiet", "-q", action="store_true", help="do not print a summary")
+    parser.add_argument("--output", "-o", required=True, help="directory to write the frames to")
+    args = parser.parse_args(argv)
+    if args.fps <= 0 or args.frames <= 0 or args.queue <= 0:
+        parser.error("--fps, --frames and --queue must be positive")
+
+    import Ripple_effect as app
+    pygame.init()
+    views = VIEWS[args.view]
+    size = args.resolution or (app.WIDTH, app.HEIGHT)
+    # No data panel off-screen: center the simulation and release the drop
+    # the same way the Start button does
+    app.panel_minimized = True
+    sim = app.sim
+    sim.drop_angle = max(0.0, min(90.0, args.angle))
+    radius = max(5.0, min(100.0, args.size))
+    sim.release(*impact_cell(app.GRID_SIZE, sim.drop_angle, radius), radius)
+    sim.rain_rate = args.rain
+
+    writer = FrameWriter(args.output, (size[0] * len(views), size[1]), args.format, args.queue, args.png_level)
+    try:
+        render_time = export(app, writer, args.frames, args.fps, size, views)
+    finally:
+        try:
+            writer.close()  # re-raises a failed write
+        finally:
+            pygame.quit()
+    if not args.quiet:
+        width, height = writer.size
+        print(f"Rendered {args.frames} frames of {width}x{height} in {render_time:.2f}s "
+              f"({args.frames / max(render_time, 1e-9):.1f} frames/s)", file=sys.stderr)
+        print(f"Wrote {writer.report()} -> {args.output}", file=sys.stderr)
+        if args.format == "raw":
+            print(f"Encode with: ffmpeg -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r {args.fps:g} "
+                  f"-i {os.path.join(args.output, 'frames.rgb')} clip.mp4", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import sys
+
+import pygame
+
+# ===================
+# Cached font lookup
+# ===================
+# pygame.font.SysFont() scans the system font database (fc-list on Linux)
+# the first time it is called, which can take seconds. FontManager resolves
+# each (family, bold, italic) to a font file once and keeps the result in a
+# small JSON file keyed by the font environment (font directories and their
+# modification times, fontconfig variables, pygame version), so later starts
+# load the files directly. Families the scan did not find, and cached files
+# that have gone missing, use pygame's default font without scanning again.
+
+FONT_DIRS = [
+    "/usr/share/fonts", "/usr/local/share/fonts", "~/.fonts", "~/.local/share/fonts",
+    "/Library/Fonts", "/System/Library/Fonts", "~/Library/Fonts",
+    os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+]
+FONT_ENV_VARS = ["FONTCONFIG_FILE", "FONTCONFIG_PATH", "XDG_DATA_DIRS"]
+
+
+def default_cache_path():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ripple-simulation", "fonts.json")
+
+
+def font_environment():
+    # Short hash that changes whenever fonts may have been added or removed
+    parts = [sys.platform, pygame.version.ver]
+    parts += [f"{var}={os.environ.get(var, '')}" for var in FONT_ENV_VARS]
+    for path in FONT_DIRS:
+        path = os.path.expanduser(path)
+        try:
+            parts.append(f"{path}:{os.stat(path).st_mtime_ns}")
+        except OSError:
+            pass
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()[:16]
+
+
+class FontManager:
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or default_cache_path()
+        self.environment = None
+        self.resolved = None  # "family|bold|italic" -> [path or None, fake bold, fake italic]
+        self.fonts = {}
+        self.scans = 0
+
+    def load(self):
+        self.environment = font_environment()
+        self.resolved = {}
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+            if cached.get("environment") == self.environment:
+                self.resolved = cached.get("fonts", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def save(self):
+        # Written atomically; a read-only cache location just means no caching
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"environment": self.environment, "fonts": self.resolved}, f, indent=1)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass
+
+    def resolve(self, family, bold, italic):
+        if self.resolved is None:
+            self.load()
+        key = f"{family.lower()}|{int(bold)}|{int(italic)}"
+        entry = self.resolved.get(key)
+        if entry is None:
+            # Let SysFont do the lookup, but only record what it would open
+            self.scans += 1
+            entry = list(pygame.font.SysFont(family, 1, bold, italic,
+                                             constructor=lambda path, size, b, i: (path, b, i)))
+            self.resolved[key] = entry
+            self.save()
+        return entry
+
+    def get(self, family, size, bold=False, italic=False):
+        key = (family, size, bold, italic)
+        font = self.fonts.get(key)
+        if font is None:
+            path, fake_bold, fake_italic = self.resolve(family, bold, italic)
+            if path is not None and not os.path.exists(path):
+                path = None
+            font = pygame.font.Font(path, size)
+            font.set_bold(fake_bold)
+            font.set_italic(fake_italic)
+            self.fonts[key] = font
+        return font
@@ -0,0 +1,73 @@
+import csv
+import time
+
+import numpy as np
+import pygame
+
+# ===================
+# Per-phase profiling
+# ===================
+# Each frame is split into named phases. mark(phase) charges the time since
+# the previous mark to that phase (several marks of the same phase add up),
+# and finished frames go into a fixed-size ring buffer.
+
+
+class FrameTimer:
+    def __init__(self, phases, capacity=600):
+        self.phases = list(phases)
+        self.index = {phase: i for i, phase in enumerate(self.phases)}
+        self.samples = np.zeros((capacity, len(self.phases)))  # milliseconds
+        self.capacity = capacity
+        self.frames = 0  # frames recorded so far (the ring keeps the last `capacity`)
+        self.current = np.zeros(len(self.phases))
+        self.last = time.perf_counter()
+
+    def start_frame(self):
+        self.current.fill(0.0)
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.current[self.index[phase]] += (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self):
+        self.samples[self.frames % self.capacity] = self.current
+        self.frames += 1
+
+    def recorded(self):
+        # Recorded frames, oldest first
+        if self.frames < self.capacity:
+            return self.samples[:self.frames]
+        start = self.frames % self.capacity
+        return np.concatenate((self.samples[start:], self.samples[:start]))
+
+    def percentiles(self, q=(50, 95)):
+        rows = self.recorded()
+        if len(rows) == 0:
+            return np.zeros((len(q), len(self.phases) + 1))
+        with_total = np.column_stack((rows, rows.sum(axis=1)))
+        return np.percentile(with_total, q, axis=0)
+
+    def write_csv(self, path):
+        rows = self.recorded()
+        first = self.frames - len(rows)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + [f"{phase}_ms" for phase in self.phases] + ["total_ms"])
+            for i, row in enumerate(rows):
+                writer.writerow([first + i] + [f"{v:.4f}" for v in row] + [f"{row.sum():.4f}"])
+        return len(rows)
+
+    def draw_overlay(self, surface, font, pos, color=(255, 255, 0)):
+        p50, p95 = self.percentiles()
+        lines = [f"{'phase':<11}{'p50':>8}{'p95':>8}"]
+        for i, phase in enumerate(self.phases + ["total"]):
+            lines.append(f"{phase:<11}{p50[i]:8.2f}{p95[i]:8.2f}")
+        line_height = font.get_linesize()
+        width = max(font.size(line)[0] for line in lines) + 16
+        backdrop = pygame.Surface((width, line_height * len(lines) + 12), pygame.SRCALPHA)
+        backdrop.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            backdrop.blit(font.render(line, True, color), (8, 6 + i * line_height))
+        return surface.blit(backdrop, pos)
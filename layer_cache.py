@@ -0,0 +1,54 @@
+import numpy as np
+import pygame
+
+# ===================
+# Static layer cache
+# ===================
+# Layers that never change between frames (background gradient, lighting,
+# panel chrome) are rendered once into Surfaces and only rebuilt when the
+# key they were built from changes (resolution, panel state, view mode...).
+
+
+class LayerCache:
+    def __init__(self):
+        self.layers = {}
+
+    def get(self, name, key, build):
+        entry = self.layers.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, build())
+            self.layers[name] = entry
+        return entry[1]
+
+    def invalidate(self, name=None):
+        if name is None:
+            self.layers.clear()
+        else:
+            self.layers.pop(name, None)
+
+
+def draw_gradient(surface, deep_color, surface_color):
+    width, height = surface.get_size()
+    for y in range(height):
+        intensity = int(deep_color[2] + (surface_color[2] - deep_color[2]) * (y / height))
+        pygame.draw.line(surface, (deep_color[0], deep_color[1], intensity), (0, y), (width, y))
+
+
+def draw_lighting(surface):
+    width, height = surface.get_size()
+    light_pos = (width // 4, height // 4)
+    xs = np.arange(width)
+    distance = np.sqrt((xs - light_pos[0]) ** 2 + (height // 2 - light_pos[1]) ** 2)
+    light_intensity = np.clip((200 / (distance + 100)).astype(int), 0, 20)
+    for x in range(width):
+        li = int(light_intensity[x])
+        pygame.draw.line(surface, (li, li, li), (x, height // 2), (x, height))
+
+
+def render_background(size, bg_color, deep_color, surface_color, lighting=True):
+    surface = pygame.Surface(size)
+    surface.fill(bg_color)
+    draw_gradient(surface, deep_color, surface_color)
+    if lighting:
+        draw_lighting(surface)
+    return surface
@@ -3,12 +3,15 @@ import numpy as np
 import math
 import random
 
-pygame.init()
+from dirty_rects import DirtyRegions
+from droplet import angled_fall
+from font_cache import FontManager
+from layer_cache import LayerCache, render_background
+from ripple_profile import RippleProfile
+from splash import SplashParticles
 
 # Screen dimensions and setup
 WIDTH, HEIGHT = 1400, 800
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Liquid Droplet Impact Simulation")
 
 # --- Colors ---
 BG_COLOR = (20, 20, 30)
@@ -33,17 +36,27 @@ INPUT_BOX_ACTIVE_COLOR = (90, 90, 120)
 TOGGLE_COLOR = (100, 100, 100)
 TOGGLE_HOVER_COLOR = (120, 120, 120)
 
-# --- Fonts ---
-FONT_DEFAULT = pygame.font.SysFont("Arial", 20)
-FONT_SCALE = pygame.font.SysFont("Arial", 14)
-FONT_TITLE = pygame.font.SysFont("Arial", 24, bold=True)
-DATA_LABEL_FONT = pygame.font.SysFont("Arial", 18)
-DATA_VALUE_FONT = pygame.font.SysFont("Arial", 18, bold=True)
-DATA_UNIT_FONT = pygame.font.SysFont("Arial", 16)
-INPUT_FONT = pygame.font.SysFont("Arial", 20)
+# --- Window and fonts ---
+# Nothing touches the display or the fonts until init_display(), so the
+# module can be imported without opening a window
+fonts = FontManager()  # font files are resolved once and cached on disk
+
+def init_display():
+    global screen, FONT_DEFAULT, FONT_SCALE, FONT_TITLE, DATA_LABEL_FONT, DATA_VALUE_FONT, DATA_UNIT_FONT, INPUT_FONT
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Liquid Droplet Impact Simulation")
+    FONT_DEFAULT = fonts.get("Arial", 20)
+    FONT_SCALE = fonts.get("Arial", 14)
+    FONT_TITLE = fonts.get("Arial", 24, bold=True)
+    DATA_LABEL_FONT = fonts.get("Arial", 18)
+    DATA_VALUE_FONT = fonts.get("Arial", 18, bold=True)
+    DATA_UNIT_FONT = fonts.get("Arial", 16)
+    INPUT_FONT = fonts.get("Arial", 20)
 
 # --- Simulation parameters ---
 water_surface = np.zeros(WIDTH)
+ripple_profile = RippleProfile(WIDTH, HEIGHT // 2)
 wave_speed = 150.0
 drop_height = 200.0
 drop_y = drop_height
@@ -92,10 +105,15 @@ drop_x_initial = WIDTH // 3
 drop_x = drop_x_initial
 drop_angle = 45.0
 initial_drop_x_ripple_origin = drop_x_initial
-splash_particles = []
+splash_particles = SplashParticles(floor_y=HEIGHT // 2)
 circle_radii = []
 bird_eye_view = False  # Initially side view
 
+# Push only the regions that changed to the display (full flip when more than
+# DIRTY_RECT_THRESHOLD of the screen changed)
+DIRTY_RECTS = True
+DIRTY_RECT_THRESHOLD = 0.5
+
 # Modified wave object structure
 class Wave:
     def __init__(self, x, y, radius, velocity, amplitude, start_time):
@@ -107,7 +125,7 @@ class Wave:
         self.start_time = start_time
 
 def reset_simulation():
-    global drop_hit_water, drop_y, ripple_time, water_surface, drop_x, ripple_amplitude, drop_radius, circle_radii, splash_particles, drop_x_initial, drop_x, initial_drop_x_ripple_origin, angle_input_text, size_input_text
+    global drop_hit_water, drop_y, ripple_time, water_surface, drop_x, ripple_amplitude, drop_radius, circle_radii, drop_x_initial, drop_x, initial_drop_x_ripple_origin, angle_input_text, size_input_text
     drop_hit_water = False
     drop_y = drop_height
     ripple_time = 0.0
@@ -116,7 +134,7 @@ def reset_simulation():
     ripple_amplitude = drop_radius * 3.5
     drop_radius = 18.0
     circle_radii = []
-    splash_particles = []
+    splash_particles.clear()
     initial_drop_x_ripple_origin = drop_x_initial
     angle_input_text = ""
     size_input_text = ""
@@ -183,21 +201,10 @@ def generate_ripple_effect(drop_x, drop_y, ripple_time, ripple_amplitude, pre_im
         pre_amp = ripple_amplitude * pre_impact_amplitude_factor
     else:
         pre_amp = ripple_amplitude
-    for x in range(WIDTH):
-        if ripple_width is not None:
-            if abs(x - drop_x) > ripple_width:
-                continue
-        distance = np.sqrt((x - drop_x) ** 2 + (HEIGHT // 2 - drop_y) ** 2)
-        if distance == 0:
-            continue
-        height = (
-            pre_amp
-            * np.exp(-distance / 120.0)
-            * np.exp(-(ripple_decay + viscosity) * ripple_time)
-            * np.sin((distance / wave_speed * (wave_frequency + random.uniform(-wavelength_variation, wavelength_variation))) - ripple_time * 2 * np.pi)
-            * np.exp(-distance * ripple_damping_factor)
-        )
-        water_surface[x] = height
+    # Before impact the origin follows the falling drop, a new envelope every frame
+    ripple_profile.generate(water_surface, drop_x, drop_y, ripple_time, pre_amp, ripple_decay + viscosity,
+                            wave_speed, wave_frequency, wavelength_variation, ripple_damping_factor, ripple_width,
+                            cache=not pre_impact)
 
 
 def update_circles():
@@ -242,41 +249,17 @@ def draw_scale():
         screen.blit(scale_text, (20, y_pos - 8))
 
 def create_splash(drop_x, drop_y, num_particles=splash_particle_count):
-    for _ in range(num_particles):
-        angle = np.random.uniform(0, 2 * np.pi)
-        speed = np.random.uniform(splash_particle_speed * 0.7 * splash_particle_variation, splash_particle_speed * 1.3 * splash_particle_variation)
-        lifetime = np.random.uniform(0.6, 1.6)
-        size = np.random.uniform(2, 6)
-        particle = {
-            "x": drop_x + np.random.uniform(-drop_radius / 2, drop_radius / 2),
-            "y": drop_y + np.random.uniform(-drop_radius / 2, drop_radius / 2),
-            "vx": speed * np.cos(angle),
-            "vy": -speed * np.sin(angle),
-            "life": lifetime,
-            "size": size
-        }
-        splash_particles.append(particle)
+    splash_particles.spawn(drop_x, drop_y, num_particles, splash_particle_speed, splash_particle_variation, drop_radius)
 
 def update_splash_particles():
-    for particle in splash_particles[:]:
-        particle["x"] += particle["vx"]
-        particle["y"] += particle["vy"]
-        particle["vy"] += 0.1
-        if particle["y"] > HEIGHT // 2 and particle["vy"] > 0:
-            particle["vy"] *= -0.4
-        particle["life"] -= 0.04
-        if particle["life"] <= 0:
-            splash_particles.remove(particle)
+    splash_particles.update()
 
 def draw_splash_particles():
-    for particle in splash_particles:
-        alpha = max(0, int(255 * (particle["life"] / 1.6)))
-        color = (DROP_COLOR[0], DROP_COLOR[1], DROP_COLOR[2], alpha)
-        pygame.draw.circle(screen, color, (int(particle["x"]), int(particle["y"])), int(particle["size"]))
+    splash_particles.draw(screen, DROP_COLOR)
 
 def draw_water_surface():
+    dirty = None
     if bird_eye_view:
-        screen.fill(WATER_COLOR_DEEP)
         if  drop_hit_water and not circle_radii: # Create circles only once upon impact in top view
             for i in range(circle_count): # Create multiple initial circles for concentric effect
                 start_radius = i * start_radius_increment # Initial radius offset for each circle
@@ -297,7 +280,8 @@ def draw_water_surface():
                         print(f"Color creation error: {e}, Color value: {color}")
                         continue # Skip drawing if color is invalid
 
-                pygame.draw.circle(screen, color, (int(wave.x), int(wave.y)), int(wave.radius), 2) # Draw circles for top view
+                circle = pygame.draw.circle(screen, color, (int(wave.x), int(wave.y)), int(wave.radius), 2) # Draw circles for top view
+                dirty = circle if dirty is None else dirty.union(circle)
     else: # Side view - modified to draw multiple lines for wave effect
         y_base = HEIGHT // 2
         layer_spacing = 4 # Spacing between wave layers
@@ -311,146 +295,163 @@ def draw_water_surface():
             for x in range(0, WIDTH, 5): # Draw short line segments, step of 5 for performance
                 height = int(y_level + water_surface[x])
                 pygame.draw.line(screen, wave_color, (x, height), (x + 5, height)) # Short horizontal lines
+        top = y_base - wave_layers * layer_spacing + int(water_surface.min()) - 1
+        bottom = y_base + wave_layers * layer_spacing + int(water_surface.max()) + 2
+        dirty = pygame.Rect(0, top, WIDTH, bottom - top)
+    return dirty
 
 
 def draw_drop():
     if simulation_started and not drop_hit_water:
         if bird_eye_view:
-            pygame.draw.circle(screen, DROP_COLOR, (int(drop_x), int(drop_y)), int(drop_radius))
+            return pygame.draw.circle(screen, DROP_COLOR, (int(drop_x), int(drop_y)), int(drop_radius))
         else:
             deform = 1 + ((HEIGHT // 2) - drop_y) / (proximity_threshold * 2)
-            pygame.draw.ellipse(screen, DROP_COLOR, (int(drop_x - drop_radius), int(drop_y - drop_radius * deform), int(drop_radius * 2), int(drop_radius * 2 * deform)))
-
-def draw_lighting():
-    light_pos = (WIDTH // 4, HEIGHT // 4)
-    light_intensity_max = 20 # Reduced for softer lighting
-    for x in range(WIDTH):
-        distance = np.sqrt((x - light_pos[0]) ** 2 + (HEIGHT // 2 - light_pos[1]) ** 2)
-        light_intensity = max(0, min(light_intensity_max, int(200 / (distance + 100))))
-        pygame.draw.line(screen, (light_intensity, light_intensity, light_intensity), (x, HEIGHT // 2), (x, HEIGHT))
-
-running = True
-clock = pygame.time.Clock()
-
-while running:
-    screen.fill(BG_COLOR)
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = event.pos
-            if start_button.collidepoint(mouse_pos):
-                try:
-                    drop_angle = float(angle_input_text) if angle_input_text else drop_angle
-                    drop_radius = float(size_input_text) if size_input_text else drop_radius
-                    ripple_amplitude = drop_radius * 3.5
-                    simulation_started = True
-                    initial_drop_x_ripple_origin = drop_x_initial
-                except ValueError:
-                    print("Invalid input. Please enter numbers for angle and size.")
-            elif reset_button.collidepoint(mouse_pos):
-                reset_simulation()
-                simulation_started = False
-            elif restart_button.collidepoint(mouse_pos):
-                reset_simulation()
-                simulation_started = True
-            elif pause_button.collidepoint(mouse_pos):
-                simulation_paused = True
-            elif unpause_button.collidepoint(mouse_pos):
-                simulation_paused = False
-            elif angle_input_box.collidepoint(mouse_pos):
-                active_input_box = angle_input_box
-            elif size_input_box.collidepoint(mouse_pos):
-                active_input_box = size_input_box
-            elif toggle_view_button.collidepoint(mouse_pos):
-                bird_eye_view = not bird_eye_view
-            else:
-                active_input_box = None
-        if event.type == pygame.KEYDOWN:
-            if active_input_box == angle_input_box:
-                if event.key == pygame.K_BACKSPACE:
-                    angle_input_text = angle_input_text[:-1]
-                elif event.unicode.isdigit() or event.unicode == '.':
-                    angle_input_text += event.unicode
-            elif active_input_box == size_input_box:
-                if event.key == pygame.K_BACKSPACE:
-                    size_input_text = size_input_text[:-1]
-                elif event.unicode.isdigit() or event.unicode == '.':
-                    size_input_text += event.unicode
-
-    for y in range(HEIGHT):
-        intensity = int(WATER_COLOR_DEEP[2] + (WATER_COLOR_SURFACE[2] - WATER_COLOR_DEEP[2]) * (y / HEIGHT))
-        pygame.draw.line(screen, (WATER_COLOR_DEEP[0], WATER_COLOR_DEEP[1], intensity), (0, y), (WIDTH, y))
-
-    if simulation_started and not drop_hit_water:
-        if drop_y >= (HEIGHT // 2) - proximity_threshold:
-            drop_radius += droplet_deformation_rate
-
-    if simulation_started and not drop_hit_water:
-        if drop_y >= (HEIGHT // 2) - (proximity_threshold / 2):
-            generate_ripple_effect(initial_drop_x_ripple_origin, drop_y, ripple_time, ripple_amplitude * (1 - ((HEIGHT // 2) - drop_y) / proximity_threshold), pre_impact=True, ripple_width=200)
-        else:
-            water_surface[:] = 0
-
-    draw_lighting()
-
-    if drop_hit_water:
-        if bird_eye_view and not circle_radii: # Create circles only once upon impact in top view
-            for i in range(circle_count): # Create multiple initial circles for concentric effect
-                start_radius = i * start_radius_increment # Initial radius offset for each circle
-                circle_radii.append(Wave(drop_x, HEIGHT // 2, start_radius, wave_speed + random.uniform(-20, 20), ripple_amplitude * random.uniform(0.8, 1.2), ripple_time))
-        if bird_eye_view:
-            update_circles()
-        else:
-            generate_ripple_effect(drop_x, HEIGHT // 2, ripple_time, ripple_amplitude)
-
-    draw_water_surface()
-    draw_drop()
-    draw_scale()
-
-    display_data_panel(screen, FONT_DEFAULT, drop_y, drop_x, ripple_amplitude, ripple_time) # Data panel drawn FIRST now
-
-    # --- Button Drawing (Buttons drawn AFTER data panel) ---
-    pygame.draw.rect(screen, BUTTON_HOVER_COLOR if start_button.collidepoint(pygame.mouse.get_pos()) else BUTTON_COLOR, start_button, border_radius=8)
-    pygame.draw.rect(screen, RESET_HOVER_COLOR if reset_button.collidepoint(pygame.mouse.get_pos()) else RESET_COLOR, reset_button, border_radius=8)
-    pygame.draw.rect(screen, RESTART_HOVER_COLOR if restart_button.collidepoint(pygame.mouse.get_pos()) else RESTART_COLOR, restart_button, border_radius=8)
-    pygame.draw.rect(screen, PAUSE_HOVER_COLOR if pause_button.collidepoint(pygame.mouse.get_pos()) else PAUSE_COLOR, pause_button, border_radius=8)
-    pygame.draw.rect(screen, UNPAUSE_HOVER_COLOR if unpause_button.collidepoint(pygame.mouse.get_pos()) else UNPAUSE_COLOR, unpause_button, border_radius=8)
-    pygame.draw.rect(screen, TOGGLE_HOVER_COLOR if toggle_view_button.collidepoint(pygame.mouse.get_pos()) else TOGGLE_COLOR, toggle_view_button, border_radius=8)
-
-    draw_text("Start", FONT_DEFAULT, TEXT_COLOR, screen, start_button.x + 35, start_button.y + 10)
-    draw_text("Reset", FONT_DEFAULT, TEXT_COLOR, screen, reset_button.x + 35, reset_button.y + 10)
-    draw_text("Restart", FONT_DEFAULT, TEXT_COLOR, screen, restart_button.x + 25, restart_button.y + 10)
-    draw_text("Pause", FONT_DEFAULT, TEXT_COLOR, screen, pause_button.x + 35, pause_button.y + 10)
-    draw_text("Unpause", FONT_DEFAULT, TEXT_COLOR, screen, unpause_button.x + 25, unpause_button.y + 10)
-    draw_text("View", FONT_DEFAULT, TEXT_COLOR, screen, toggle_view_button.x + 35, toggle_view_button.y + 10)
+            return pygame.draw.ellipse(screen, DROP_COLOR, (int(drop_x - drop_radius), int(drop_y - drop_radius * deform), int(drop_radius * 2), int(drop_radius * 2 * deform)))
 
+def build_background():
+    if bird_eye_view:
+        background = pygame.Surface((WIDTH, HEIGHT))
+        background.fill(WATER_COLOR_DEEP)
+        return background
+    return render_background((WIDTH, HEIGHT), BG_COLOR, WATER_COLOR_DEEP, WATER_COLOR_SURFACE)
+
+layers = LayerCache()
+
+def main():
+    global drop_angle, drop_radius, ripple_amplitude, simulation_started, simulation_paused, initial_drop_x_ripple_origin
+    global active_input_box, angle_input_text, size_input_text, bird_eye_view, drop_x, drop_y, drop_hit_water, ripple_time
+    init_display()
+    running = True
+    clock = pygame.time.Clock()
+    dirty_regions = DirtyRegions((WIDTH, HEIGHT), DIRTY_RECT_THRESHOLD, enabled=DIRTY_RECTS)
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty_regions.invalidate()
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                mouse_pos = event.pos
+                if start_button.collidepoint(mouse_pos):
+                    try:
+                        drop_angle = float(angle_input_text) if angle_input_text else drop_angle
+                        drop_radius = float(size_input_text) if size_input_text else drop_radius
+                        ripple_amplitude = drop_radius * 3.5
+                        simulation_started = True
+                        initial_drop_x_ripple_origin = drop_x_initial
+                    except ValueError:
+                        print("Invalid input. Please enter numbers for angle and size.")
+                elif reset_button.collidepoint(mouse_pos):
+                    reset_simulation()
+                    simulation_started = False
+                elif restart_button.collidepoint(mouse_pos):
+                    reset_simulation()
+                    simulation_started = True
+                elif pause_button.collidepoint(mouse_pos):
+                    simulation_paused = True
+                elif unpause_button.collidepoint(mouse_pos):
+                    simulation_paused = False
+                elif angle_input_box.collidepoint(mouse_pos):
+                    active_input_box = angle_input_box
+                elif size_input_box.collidepoint(mouse_pos):
+                    active_input_box = size_input_box
+                elif toggle_view_button.collidepoint(mouse_pos):
+                    bird_eye_view = not bird_eye_view
+                    dirty_regions.invalidate()  # the two views have different backgrounds
+                else:
+                    active_input_box = None
+            if event.type == pygame.KEYDOWN:
+                if active_input_box == angle_input_box:
+                    if event.key == pygame.K_BACKSPACE:
+                        angle_input_text = angle_input_text[:-1]
+                    elif event.unicode.isdigit() or event.unicode == '.':
+                        angle_input_text += event.unicode
+                elif active_input_box == size_input_box:
+                    if event.key == pygame.K_BACKSPACE:
+                        size_input_text = size_input_text[:-1]
+                    elif event.unicode.isdigit() or event.unicode == '.':
+                        size_input_text += event.unicode
+
+        screen.blit(layers.get("background", ((WIDTH, HEIGHT), bird_eye_view), build_background), (0, 0))
 
-    if not simulation_paused:
         if simulation_started and not drop_hit_water:
-            drop_y += drop_fall_speed * math.cos(math.radians(drop_angle))
-            drop_x += drop_fall_speed * math.sin(math.radians(drop_angle))
-            drop_x = max(0, min(WIDTH, drop_x))
-            if drop_y >= HEIGHT // 2:
-                drop_hit_water = True
-                create_splash(drop_x, HEIGHT // 2)
+            if drop_y >= (HEIGHT // 2) - proximity_threshold:
+                drop_radius += droplet_deformation_rate
 
+        if simulation_started and not drop_hit_water:
+            if drop_y >= (HEIGHT // 2) - (proximity_threshold / 2):
+                generate_ripple_effect(initial_drop_x_ripple_origin, drop_y, ripple_time, ripple_amplitude * (1 - ((HEIGHT // 2) - drop_y) / proximity_threshold), pre_impact=True, ripple_width=200)
+            else:
+                water_surface[:] = 0
 
         if drop_hit_water:
-            ripple_time += 0.02
-            ripple_amplitude *= math.exp(-(ripple_decay + viscosity))
-            if bird_eye_view and ripple_amplitude < 0.005: # Reset in top view when ripples are very faint
-                reset_simulation()
-                simulation_started = False
-            elif ripple_amplitude < 0.01 and not bird_eye_view: # Keep circles for top view longer, reduced amplitude threshold
-                reset_simulation()
-                simulation_started = False
-
-
-    update_splash_particles()
-    draw_splash_particles()
-
-    pygame.display.update()
-    clock.tick(60)
-
-pygame.quit()
\ No newline at end of file
+            if bird_eye_view and not circle_radii: # Create circles only once upon impact in top view
+                for i in range(circle_count): # Create multiple initial circles for concentric effect
+                    start_radius = i * start_radius_increment # Initial radius offset for each circle
+                    circle_radii.append(Wave(drop_x, HEIGHT // 2, start_radius, wave_speed + random.uniform(-20, 20), ripple_amplitude * random.uniform(0.8, 1.2), ripple_time))
+            if bird_eye_view:
+                update_circles()
+            else:
+                generate_ripple_effect(drop_x, HEIGHT // 2, ripple_time, ripple_amplitude)
+
+        # The water only moves while a drop is falling or rippling
+        dirty_regions.track("water", draw_water_surface(), None if simulation_started or drop_hit_water else "still")
+        dirty_regions.track("drop", draw_drop())
+        draw_scale()
+
+        display_data_panel(screen, FONT_DEFAULT, drop_y, drop_x, ripple_amplitude, ripple_time) # Data panel drawn FIRST now
+        dirty_regions.track("panel", (1000, 20, 380, 760), (bird_eye_view, active_input_box, angle_input_text, size_input_text,
+                                                            drop_y, drop_radius, drop_angle, ripple_amplitude))
+
+        # --- Button Drawing (Buttons drawn AFTER data panel) ---
+        mouse_pos = pygame.mouse.get_pos()
+        buttons = [start_button, reset_button, restart_button, pause_button, unpause_button, toggle_view_button]
+        dirty_regions.track("buttons", buttons[0].unionall(buttons[1:]), tuple(btn.collidepoint(mouse_pos) for btn in buttons))
+        pygame.draw.rect(screen, BUTTON_HOVER_COLOR if start_button.collidepoint(pygame.mouse.get_pos()) else BUTTON_COLOR, start_button, border_radius=8)
+        pygame.draw.rect(screen, RESET_HOVER_COLOR if reset_button.collidepoint(pygame.mouse.get_pos()) else RESET_COLOR, reset_button, border_radius=8)
+        pygame.draw.rect(screen, RESTART_HOVER_COLOR if restart_button.collidepoint(pygame.mouse.get_pos()) else RESTART_COLOR, restart_button, border_radius=8)
+        pygame.draw.rect(screen, PAUSE_HOVER_COLOR if pause_button.collidepoint(pygame.mouse.get_pos()) else PAUSE_COLOR, pause_button, border_radius=8)
+        pygame.draw.rect(screen, UNPAUSE_HOVER_COLOR if unpause_button.collidepoint(pygame.mouse.get_pos()) else UNPAUSE_COLOR, unpause_button, border_radius=8)
+        pygame.draw.rect(screen, TOGGLE_HOVER_COLOR if toggle_view_button.collidepoint(pygame.mouse.get_pos()) else TOGGLE_COLOR, toggle_view_button, border_radius=8)
+
+        draw_text("Start", FONT_DEFAULT, TEXT_COLOR, screen, start_button.x + 35, start_button.y + 10)
+        draw_text("Reset", FONT_DEFAULT, TEXT_COLOR, screen, reset_button.x + 35, reset_button.y + 10)
+        draw_text("Restart", FONT_DEFAULT, TEXT_COLOR, screen, restart_button.x + 25, restart_button.y + 10)
+        draw_text("Pause", FONT_DEFAULT, TEXT_COLOR, screen, pause_button.x + 35, pause_button.y + 10)
+        draw_text("Unpause", FONT_DEFAULT, TEXT_COLOR, screen, unpause_button.x + 25, unpause_button.y + 10)
+        draw_text("View", FONT_DEFAULT, TEXT_COLOR, screen, toggle_view_button.x + 35, toggle_view_button.y + 10)
+
+
+        if not simulation_paused:
+            if simulation_started and not drop_hit_water:
+                drop_x, drop_y = angled_fall(drop_x, drop_y, drop_angle, drop_fall_speed, WIDTH)
+                if drop_y >= HEIGHT // 2:
+                    drop_hit_water = True
+                    create_splash(drop_x, HEIGHT // 2)
+
+
+            if drop_hit_water:
+                ripple_time += 0.02
+                ripple_amplitude *= math.exp(-(ripple_decay + viscosity))
+                if bird_eye_view and ripple_amplitude < 0.005: # Reset in top view when ripples are very faint
+                    reset_simulation()
+                    simulation_started = False
+                elif ripple_amplitude < 0.01 and not bird_eye_view: # Keep circles for top view longer, reduced amplitude threshold
+                    reset_simulation()
+                    simulation_started = False
+
+
+        update_splash_particles()
+        draw_splash_particles()
+        dirty_regions.track("particles", splash_particles.bounds())
+
+        dirty_regions.update()
+        clock.tick(60)
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,9 +1,14 @@
 import pygame
 import numpy as np
 import math
-import random
 
-pygame.init()
+from dirty_rects import DirtyRegions
+from droplet import angled_fall
+from font_cache import FontManager
+from layer_cache import LayerCache, render_background
+from ripple_profile import RippleProfile
+from splash import SplashParticles
+from timestep import FixedTimestep
 
 # =======================
 # Configuration Constants
@@ -35,20 +40,28 @@ ENABLE_DEFORMATION = False
 # -----------------------
 # Fonts and Screen Setup
 # -----------------------
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Liquid Droplet Impact Simulation")
-FONT_DEFAULT = pygame.font.SysFont("Arial", 20)
-FONT_SCALE = pygame.font.SysFont("Arial", 14)
-FONT_TITLE = pygame.font.SysFont("Arial", 24, bold=True)
-DATA_LABEL_FONT = pygame.font.SysFont("Arial", 18)
-DATA_VALUE_FONT = pygame.font.SysFont("Arial", 18, bold=True)
-DATA_UNIT_FONT = pygame.font.SysFont("Arial", 16)
-INPUT_FONT = pygame.font.SysFont("Arial", 20)
+# Nothing touches the display or the fonts until init_display(), so the
+# module can be imported without opening a window
+fonts = FontManager()  # font files are resolved once and cached on disk
+
+def init_display():
+    global screen, FONT_DEFAULT, FONT_SCALE, FONT_TITLE, DATA_LABEL_FONT, DATA_VALUE_FONT, DATA_UNIT_FONT, INPUT_FONT
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Liquid Droplet Impact Simulation")
+    FONT_DEFAULT = fonts.get("Arial", 20)
+    FONT_SCALE = fonts.get("Arial", 14)
+    FONT_TITLE = fonts.get("Arial", 24, bold=True)
+    DATA_LABEL_FONT = fonts.get("Arial", 18)
+    DATA_VALUE_FONT = fonts.get("Arial", 18, bold=True)
+    DATA_UNIT_FONT = fonts.get("Arial", 16)
+    INPUT_FONT = fonts.get("Arial", 20)
 
 # ======================
 # Simulation Parameters
 # ======================
 water_surface = np.zeros(WIDTH)
+ripple_profile = RippleProfile(WIDTH, HEIGHT // 2)
 wave_speed = 150.0
 drop_height = 200.0
 drop_fall_speed = 8.0
@@ -69,6 +82,15 @@ wavelength_variation = 0.2
 splash_particle_speed = 3.5
 splash_particle_count = 30
 
+# Physics runs at a fixed rate, independent of the frame rate
+PHYSICS_HZ = 60  # steps per second (ripple_time advances 0.02 per step)
+MAX_SUBSTEPS = 5  # per rendered frame, extra time is dropped
+
+# Push only the regions that changed to the display (full flip when more than
+# DIRTY_RECT_THRESHOLD of the screen changed)
+DIRTY_RECTS = True
+DIRTY_RECT_THRESHOLD = 0.5
+
 # =====================
 # UI Elements and State
 # =====================
@@ -94,24 +116,26 @@ drop_x = drop_x_initial
 drop_y = drop_height
 drop_angle = 45.0
 ripple_time = 0.0
+previous_ripple_time = 0.0  # ripple_time before the last physics step
 initial_drop_x_ripple_origin = drop_x_initial
 
-splash_particles = []
+splash_particles = SplashParticles(floor_y=HEIGHT // 2)
 # (circle_radii removed as it is no longer used)
 
 # ============
 # Helper Functions
 # ============
 def reset_simulation():
-    global drop_hit_water, drop_y, ripple_time, water_surface, drop_x, ripple_amplitude, drop_radius, splash_particles, initial_drop_x_ripple_origin, angle_input_text, size_input_text
+    global drop_hit_water, drop_y, ripple_time, previous_ripple_time, water_surface, drop_x, ripple_amplitude, drop_radius, initial_drop_x_ripple_origin, angle_input_text, size_input_text
     drop_hit_water = False
     drop_y = drop_height
     ripple_time = 0.0
+    previous_ripple_time = 0.0
     water_surface[:] = 0.0
     drop_x = drop_x_initial
     drop_radius = default_drop_radius
     ripple_amplitude = drop_radius * 3.5
-    splash_particles = []
+    splash_particles.clear()
     initial_drop_x_ripple_origin = drop_x_initial
     angle_input_text = ""
     size_input_text = ""
@@ -182,19 +206,10 @@ def generate_ripple_effect(drop_x_val, drop_y_val, current_time, amplitude, pre_
         effective_amp = amplitude * pre_impact_amplitude_factor
     else:
         effective_amp = amplitude
-    for x in range(WIDTH):
-        if ripple_width is not None and abs(x - drop_x_val) > ripple_width:
-            continue
-        distance = np.sqrt((x - drop_x_val) ** 2 + (HEIGHT // 2 - drop_y_val) ** 2)
-        if distance == 0:
-            continue
-        water_surface[x] = (
-            effective_amp *
-            np.exp(-distance / 120.0) *
-            np.exp(-(ripple_decay + viscosity) * current_time) *
-            np.sin((distance / wave_speed * (wave_frequency + random.uniform(-wavelength_variation, wavelength_variation))) - current_time * 2 * np.pi) *
-            np.exp(-distance * ripple_damping_factor)
-        )
+    # Before impact the origin follows the falling drop, a new envelope every frame
+    ripple_profile.generate(water_surface, drop_x_val, drop_y_val, current_time, effective_amp, ripple_decay + viscosity,
+                            wave_speed, wave_frequency, wavelength_variation, ripple_damping_factor, ripple_width,
+                            cache=not pre_impact)
 
 def draw_scale():
     for i in range(1, 11):
@@ -204,181 +219,45 @@ def draw_scale():
         screen.blit(scale_text, (20, y_pos - 8))
 
 def create_splash(drop_x_val, drop_y_val, num_particles=splash_particle_count):
-    for _ in range(num_particles):
-        angle = np.random.uniform(0, 2 * np.pi)
-        speed = np.random.uniform(splash_particle_speed * 0.7 * splash_particle_variation,
-                                  splash_particle_speed * 1.3 * splash_particle_variation)
-        lifetime = np.random.uniform(0.6, 1.6)
-        size = np.random.uniform(2, 6)
-        particle = {
-            "x": drop_x_val + np.random.uniform(-drop_radius / 2, drop_radius / 2),
-            "y": drop_y_val + np.random.uniform(-drop_radius / 2, drop_radius / 2),
-            "vx": speed * np.cos(angle),
-            "vy": -speed * np.sin(angle),
-            "life": lifetime,
-            "size": size
-        }
-        splash_particles.append(particle)
+    splash_particles.spawn(drop_x_val, drop_y_val, num_particles, splash_particle_speed, splash_particle_variation, drop_radius)
 
 def update_splash_particles():
-    for particle in splash_particles[:]:
-        particle["x"] += particle["vx"]
-        particle["y"] += particle["vy"]
-        particle["vy"] += 0.1
-        if particle["y"] > HEIGHT // 2 and particle["vy"] > 0:
-            particle["vy"] *= -0.4
-        particle["life"] -= 0.04
-        if particle["life"] <= 0:
-            splash_particles.remove(particle)
+    splash_particles.update()
 
 def draw_splash_particles():
-    for particle in splash_particles:
-        alpha = max(0, int(255 * (particle["life"] / 1.6)))
-        color = (DROP_COLOR[0], DROP_COLOR[1], DROP_COLOR[2], alpha)
-        pygame.draw.circle(screen, color, (int(particle["x"]), int(particle["y"])), int(particle["size"]))
+    splash_particles.draw(screen, DROP_COLOR)
 
 def draw_water_surface():
     for x in range(WIDTH):
         height_val = int(HEIGHT // 2 + water_surface[x])
         color_intensity = max(0, min(255, int(120 + water_surface[x] * 5)))
         pygame.draw.line(screen, (WATER_COLOR_SURFACE[0], WATER_COLOR_SURFACE[1], color_intensity), (x, height_val), (x, HEIGHT))
+    top = HEIGHT // 2 + int(water_surface.min()) - 1
+    return pygame.Rect(0, top, WIDTH, HEIGHT - top)
 
 def draw_drop():
     # If deformation is enabled, compute a deformation factor; otherwise, use 1.0 for a perfect circle.
     if simulation_started and not drop_hit_water:
         deform = 1 + ((HEIGHT // 2) - drop_y) / (proximity_threshold * 2) if ENABLE_DEFORMATION else 1.0
-        pygame.draw.ellipse(screen, DROP_COLOR, (
+        return pygame.draw.ellipse(screen, DROP_COLOR, (
             int(drop_x - drop_radius),
             int(drop_y - drop_radius * deform),
             int(drop_radius * 2),
             int(drop_radius * 2 * deform)
         ))
 
-def draw_lighting():
-    light_pos = (WIDTH // 4, HEIGHT // 4)
-    for x in range(WIDTH):
-        distance = np.sqrt((x - light_pos[0]) ** 2 + (HEIGHT // 2 - light_pos[1]) ** 2)
-        light_intensity = max(0, min(20, int(200 / (distance + 100))))
-        pygame.draw.line(screen, (light_intensity, light_intensity, light_intensity, 30), (x, HEIGHT // 2), (x, HEIGHT))
+def build_background():
+    return render_background((WIDTH, HEIGHT), BG_COLOR, WATER_COLOR_DEEP, WATER_COLOR_SURFACE)
 
-# ====================
-# Main Simulation Loop
-# ====================
-running = True
-clock = pygame.time.Clock()
-
-while running:
-    screen.fill(BG_COLOR)
-
-    # ------------------
-    # Event Handling
-    # ------------------
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = event.pos
-            if start_button.collidepoint(mouse_pos):
-                try:
-                    drop_angle = float(angle_input_text) if angle_input_text else drop_angle
-                    drop_radius = float(size_input_text) if size_input_text else drop_radius
-                    ripple_amplitude = drop_radius * 3.5
-                    reset_simulation()
-                    simulation_started = True
-                    initial_drop_x_ripple_origin = drop_x_initial
-                except ValueError:
-                    print("Invalid input. Please enter numbers for angle and size.")
-            elif reset_button.collidepoint(mouse_pos):
-                reset_simulation()
-                simulation_started = False
-            elif restart_button.collidepoint(mouse_pos):
-                reset_simulation()
-                simulation_started = True
-            elif pause_button.collidepoint(mouse_pos):
-                simulation_paused = True
-            elif unpause_button.collidepoint(mouse_pos):
-                simulation_paused = False
-            elif angle_input_box.collidepoint(mouse_pos):
-                active_input_box = angle_input_box
-            elif size_input_box.collidepoint(mouse_pos):
-                active_input_box = size_input_box
-            else:
-                active_input_box = None
-
-        elif event.type == pygame.KEYDOWN:
-            if active_input_box == angle_input_box:
-                if event.key == pygame.K_BACKSPACE:
-                    angle_input_text = angle_input_text[:-1]
-                elif event.unicode.isdigit() or event.unicode == '.':
-                    angle_input_text += event.unicode
-            elif active_input_box == size_input_box:
-                if event.key == pygame.K_BACKSPACE:
-                    size_input_text = size_input_text[:-1]
-                elif event.unicode.isdigit() or event.unicode == '.':
-                    size_input_text += event.unicode
-
-    # ------------------
-    # Drawing Background
-    # ------------------
-    for y in range(HEIGHT):
-        intensity = int(WATER_COLOR_DEEP[2] + (WATER_COLOR_SURFACE[2] - WATER_COLOR_DEEP[2]) * (y / HEIGHT))
-        pygame.draw.line(screen, (WATER_COLOR_DEEP[0], WATER_COLOR_DEEP[1], intensity), (0, y), (WIDTH, y))
-
-    # -----------------------
-    # Droplet and Ripple Updates
-    # -----------------------
-    # Optional droplet deformation update
-    if simulation_started and not drop_hit_water and ENABLE_DEFORMATION:
-        if drop_y >= (HEIGHT // 2) - proximity_threshold:
-            drop_radius += droplet_deformation_rate
-
-    # Pre-impact ripple effect
-    if simulation_started and not drop_hit_water:
-        if drop_y >= (HEIGHT // 2) - (proximity_threshold / 2):
-            generate_ripple_effect(initial_drop_x_ripple_origin, drop_y, ripple_time,
-                                   ripple_amplitude * (1 - ((HEIGHT // 2) - drop_y) / proximity_threshold),
-                                   pre_impact=True, ripple_width=200)
-        else:
-            water_surface[:] = 0
-
-    draw_lighting()
-
-    # Post-impact ripple generation
-    if drop_hit_water:
-        generate_ripple_effect(drop_x, HEIGHT // 2, ripple_time, ripple_amplitude)
-
-    draw_water_surface()
-    draw_drop()
-    draw_scale()
-
-    # -----------------
-    # Draw UI Buttons
-    # -----------------
-    for btn, label, offset in [
-        (start_button, "Start", 35),
-        (reset_button, "Reset", 35),
-        (restart_button, "Restart", 25),
-        (pause_button, "Pause", 35),
-        (unpause_button, "Unpause", 25)
-    ]:
-        color = BUTTON_HOVER_COLOR if btn.collidepoint(pygame.mouse.get_pos()) else (
-            RESET_COLOR if btn == reset_button else 
-            RESTART_COLOR if btn == restart_button else 
-            PAUSE_COLOR if btn == pause_button else 
-            UNPAUSE_COLOR if btn == unpause_button else 
-            BUTTON_COLOR)
-        pygame.draw.rect(screen, color, btn, border_radius=8)
-        draw_text(label, FONT_DEFAULT, TEXT_COLOR, screen, btn.x + offset, btn.y + 10)
-
-    # -----------------
-    # Simulation Updates
-    # -----------------
+layers = LayerCache()
+
+def step_simulation():
+    # One fixed physics step (PHYSICS_HZ per second)
+    global drop_y, drop_x, drop_hit_water, ripple_time, previous_ripple_time, ripple_amplitude, simulation_started
+    previous_ripple_time = ripple_time
     if not simulation_paused:
         if simulation_started and not drop_hit_water:
-            drop_y += drop_fall_speed * math.cos(math.radians(drop_angle))
-            drop_x += drop_fall_speed * math.sin(math.radians(drop_angle))
-            drop_x = max(0, min(WIDTH, drop_x))
+            drop_x, drop_y = angled_fall(drop_x, drop_y, drop_angle, drop_fall_speed, WIDTH)
             if drop_y >= HEIGHT // 2:
                 drop_hit_water = True
                 create_splash(drop_x, HEIGHT // 2)
@@ -391,10 +270,142 @@ while running:
                 simulation_started = False
 
     update_splash_particles()
-    draw_splash_particles()
-    display_data_panel(screen)
 
-    pygame.display.update()
-    clock.tick(60)
+# ====================
+# Main Simulation Loop
+# ====================
+def main():
+    global drop_angle, drop_radius, ripple_amplitude, simulation_started, simulation_paused, initial_drop_x_ripple_origin
+    global active_input_box, angle_input_text, size_input_text
+    init_display()
+    running = True
+    clock = pygame.time.Clock()
+    physics_clock = FixedTimestep(PHYSICS_HZ, MAX_SUBSTEPS)
+    frame_time = physics_clock.dt
+    dirty_regions = DirtyRegions((WIDTH, HEIGHT), DIRTY_RECT_THRESHOLD, enabled=DIRTY_RECTS)
+
+    while running:
+        # ------------------
+        # Event Handling
+        # ------------------
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty_regions.invalidate()
+
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                mouse_pos = event.pos
+                if start_button.collidepoint(mouse_pos):
+                    try:
+                        drop_angle = float(angle_input_text) if angle_input_text else drop_angle
+                        drop_radius = float(size_input_text) if size_input_text else drop_radius
+                        ripple_amplitude = drop_radius * 3.5
+                        reset_simulation()
+                        simulation_started = True
+                        initial_drop_x_ripple_origin = drop_x_initial
+                    except ValueError:
+                        print("Invalid input. Please enter numbers for angle and size.")
+                elif reset_button.collidepoint(mouse_pos):
+                    reset_simulation()
+                    simulation_started = False
+                elif restart_button.collidepoint(mouse_pos):
+                    reset_simulation()
+                    simulation_started = True
+                elif pause_button.collidepoint(mouse_pos):
+                    simulation_paused = True
+                elif unpause_button.collidepoint(mouse_pos):
+                    simulation_paused = False
+                elif angle_input_box.collidepoint(mouse_pos):
+                    active_input_box = angle_input_box
+                elif size_input_box.collidepoint(mouse_pos):
+                    active_input_box = size_input_box
+                else:
+                    active_input_box = None
+
+            elif event.type == pygame.KEYDOWN:
+                if active_input_box == angle_input_box:
+                    if event.key == pygame.K_BACKSPACE:
+                        angle_input_text = angle_input_text[:-1]
+                    elif event.unicode.isdigit() or event.unicode == '.':
+                        angle_input_text += event.unicode
+                elif active_input_box == size_input_box:
+                    if event.key == pygame.K_BACKSPACE:
+                        size_input_text = size_input_text[:-1]
+                    elif event.unicode.isdigit() or event.unicode == '.':
+                        size_input_text += event.unicode
+
+        # ------------------
+        # Drawing Background
+        # ------------------
+        screen.blit(layers.get("background", (WIDTH, HEIGHT), build_background), (0, 0))
+
+        # -----------------------
+        # Droplet and Ripple Updates
+        # -----------------------
+        # Optional droplet deformation update
+        if simulation_started and not drop_hit_water and ENABLE_DEFORMATION:
+            if drop_y >= (HEIGHT // 2) - proximity_threshold:
+                drop_radius += droplet_deformation_rate
+
+        # Pre-impact ripple effect
+        if simulation_started and not drop_hit_water:
+            if drop_y >= (HEIGHT // 2) - (proximity_threshold / 2):
+                generate_ripple_effect(initial_drop_x_ripple_origin, drop_y, ripple_time,
+                                       ripple_amplitude * (1 - ((HEIGHT // 2) - drop_y) / proximity_threshold),
+                                       pre_impact=True, ripple_width=200)
+            else:
+                water_surface[:] = 0
 
-pygame.quit()
+        # Post-impact ripple generation
+        if drop_hit_water:
+            generate_ripple_effect(drop_x, HEIGHT // 2, physics_clock.interpolate(previous_ripple_time, ripple_time), ripple_amplitude)
+
+        # The water line only moves while a drop is falling or rippling
+        dirty_regions.track("water", draw_water_surface(), None if simulation_started or drop_hit_water else "still")
+        dirty_regions.track("drop", draw_drop())
+        draw_scale()
+
+        # -----------------
+        # Draw UI Buttons
+        # -----------------
+        mouse_pos = pygame.mouse.get_pos()
+        buttons = [start_button, reset_button, restart_button, pause_button, unpause_button]
+        dirty_regions.track("buttons", buttons[0].unionall(buttons[1:]), tuple(btn.collidepoint(mouse_pos) for btn in buttons))
+        for btn, label, offset in [
+            (start_button, "Start", 35),
+            (reset_button, "Reset", 35),
+            (restart_button, "Restart", 25),
+            (pause_button, "Pause", 35),
+            (unpause_button, "Unpause", 25)
+        ]:
+            color = BUTTON_HOVER_COLOR if btn.collidepoint(pygame.mouse.get_pos()) else (
+                RESET_COLOR if btn == reset_button else 
+                RESTART_COLOR if btn == restart_button else 
+                PAUSE_COLOR if btn == pause_button else 
+                UNPAUSE_COLOR if btn == unpause_button else 
+                BUTTON_COLOR)
+            pygame.draw.rect(screen, color, btn, border_radius=8)
+            draw_text(label, FONT_DEFAULT, TEXT_COLOR, screen, btn.x + offset, btn.y + 10)
+
+        # -----------------
+        # Simulation Updates
+        # -----------------
+        for _ in range(physics_clock.advance(frame_time)):
+            step_simulation()
+
+        draw_splash_particles()
+        dirty_regions.track("particles", splash_particles.bounds())
+        display_data_panel(screen)
+        dirty_regions.track("panel", (1000, 20, 380, 680), (active_input_box, angle_input_text, size_input_text, drop_x, drop_y,
+                                                            drop_radius, drop_angle, ripple_amplitude, ripple_time))
+
+        dirty_regions.update()
+        frame_time = clock.tick(60) / 1000.0
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
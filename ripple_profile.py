@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+import numpy as np
+
+# ==========================
+# Analytic side-view ripple
+# ==========================
+# The side-view water line of ripple21/ripple22 is
+#   amp * exp(-d/120) * exp(-decay*t) * sin(d/wave_speed*(freq + jitter) - 2*pi*t) * exp(-d*damping)
+# where d is the distance of each column from the impact. Everything that
+# only depends on d is cached per impact position; the rest is one array
+# expression per frame. Pass cache=False for an origin that moves every
+# frame (the falling drop before impact), so it does not evict the rest.
+
+
+class RippleProfile:
+    def __init__(self, width, surface_y, max_entries=16):
+        self.width = width
+        self.surface_y = surface_y  # y of the resting water line
+        self.max_entries = max_entries
+        self.xs = np.arange(width, dtype=np.float64)
+        self.envelopes = OrderedDict()
+
+    def envelope(self, origin_x, origin_y, damping_factor, ripple_width=None, cache=True):
+        key = (origin_x, origin_y, damping_factor, ripple_width)
+        entry = self.envelopes.get(key)
+        if entry is not None:
+            self.envelopes.move_to_end(key)
+            return entry
+        distance = np.sqrt((self.xs - origin_x) ** 2 + (self.surface_y - origin_y) ** 2)
+        # Columns outside ripple_width, and the impact column itself, are left untouched
+        keep = distance != 0
+        if ripple_width is not None:
+            keep &= np.abs(self.xs - origin_x) <= ripple_width
+        columns = np.nonzero(keep)[0]
+        distance = distance[columns]
+        entry = (columns, distance, np.exp(-distance / 120.0) * np.exp(-distance * damping_factor))
+        if not cache:
+            return entry
+        self.envelopes[key] = entry
+        if len(self.envelopes) > self.max_entries:
+            self.envelopes.popitem(last=False)
+        return entry
+
+    def generate(self, out, origin_x, origin_y, time, amplitude, decay, wave_speed, frequency,
+                 wavelength_variation, damping_factor, ripple_width=None, cache=True):
+        columns, distance, envelope = self.envelope(origin_x, origin_y, damping_factor, ripple_width, cache)
+        jitter = np.random.uniform(-wavelength_variation, wavelength_variation, len(columns))
+        phase = distance / wave_speed * (frequency + jitter) - time * 2 * np.pi
+        out[columns] = amplitude * np.exp(-decay * time) * envelope * np.sin(phase)
+        return out
@@ -0,0 +1,209 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from drops import DropManager
+from droplet import DEFAULT_DROP_RADIUS, DROP_HEIGHT, IMPACT_HEIGHT, impact_cell, impact_energy
+from snapshot import read_snapshot, write_snapshot
+from spectral import SpectralGrid
+from wave_grid import DTYPES, WaveGrid
+
+# ==========================
+# Headless impact simulation
+# ==========================
+# Runs Ripple_effect.py's grid physics without pygame or a display: a drop
+# released at the given angle and size hits the grid, which is then stepped
+# as fast as the CPU allows. The final and/or sampled height fields are
+# written to an .npz file (arrays "final", "samples", "sample_steps" plus the
+# run parameters as JSON in "params"). A run can also start from a snapshot
+# (--resume) and leave one behind (--checkpoint), e.g. to branch a long run
+# with different parameters. With --solver spectral the grid has periodic
+# edges and long stretches without sampling are done in one FFT jump instead
+# of step by step. --rain replaces the single drop with a Poisson stream of
+# drops at random cells.
+
+STEPS_PER_SECOND = 120  # Ripple_effect.py's PHYSICS_HZ, sets the rain rate per step
+
+# Used when neither a flag nor the --resume snapshot gives a value; the
+# snapshot field each one is read from is on the right
+DEFAULTS = {"angle": 45.0, "size": DEFAULT_DROP_RADIUS, "spring_k": 0.04, "damping": 0.985, "spread": 0.15}
+STATE_FIELDS = {"angle": "drop_angle", "size": "drop_radius", "spring_k": "spring_k", "damping": "damping",
+                "spread": "spread"}
+
+
+def simulate(grid, angle, radius, steps, fall_speed=8.0, energy_scale=0.2, sample_every=0, hit=False, drop=None):
+    # Step the grid `steps` times after releasing the drop (or without a drop
+    # when it has already hit). `drop` = (x, z, drop_y) continues a drop that
+    # is already falling instead. Returns the height field every
+    # `sample_every` steps, the step numbers, the step the drop landed on (0
+    # if it had already landed, None if it never did) and the drop's final
+    # drop_y; the final state is left in the grid.
+    if drop is None:
+        drop = impact_cell(grid.size, angle, radius) + (DROP_HEIGHT,)
+    x, z, drop_y = drop
+    impact_step = 0 if hit else None
+    count = steps // sample_every if sample_every else 0
+    samples = np.empty((count,) + grid.water_y.shape, dtype=grid.water_y.dtype)
+    sample_steps = np.arange(1, count + 1) * sample_every
+    step = 0
+    while step < steps:
+        if not hit:
+            # Droplet physics, one step at a time until it hits the water
+            drop_y += fall_speed
+            if drop_y >= IMPACT_HEIGHT:
+                hit = True
+                impact_step = step + 1
+                grid.impact(x, z, radius, impact_energy(radius, fall_speed, energy_scale))
+            n = 1
+        elif sample_every:
+            n = min(steps, (step // sample_every + 1) * sample_every) - step
+        else:
+            n = steps - step
+        grid.step(n)
+        step += n
+        if sample_every and step % sample_every == 0:
+            samples[step // sample_every - 1] = grid.water_y
+    return samples, sample_steps, impact_step, drop_y
+
+
+def simulate_rain(grid, drops, rate, steps, radius_range=(2.0, 6.0), sample_every=0):
+    # Like simulate(), but every step adds the rain that arrived (`rate` drops
+    # per second on average), moves all drops and deposits the ones that landed
+    count = steps // sample_every if sample_every else 0
+    samples = np.empty((count,) + grid.water_y.shape, dtype=grid.water_y.dtype)
+    sample_steps = np.arange(1, count + 1) * sample_every
+    for step in range(1, steps + 1):
+        drops.rain(rate, 1.0 / STEPS_PER_SECOND, grid.size, radius_range)
+        drops.update(grid)
+        grid.step()
+        if sample_every and step % sample_every == 0:
+            samples[step // sample_every - 1] = grid.water_y
+    return samples, sample_steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a droplet impact on the water grid without a display.")
+    parser.add_argument("--angle", type=float, default=None,
+                        help=f"drop angle in degrees (0-90; default: from --resume, else {DEFAULTS['angle']})")
+    parser.add_argument("--size", type=float, default=None,
+                        help=f"drop radius in grid cells (5-100; default: from --resume, else {DEFAULTS['size']})")
+    parser.add_argument("--grid-size", type=int, default=120, help="grid points per side")
+    parser.add_argument("--steps", type=int, default=1000, help="physics steps to run")
+    parser.add_argument("--spring-k", type=float, default=None,
+                        help=f"spring constant (default: from --resume, else {DEFAULTS['spring_k']})")
+    parser.add_argument("--damping", type=float, default=None,
+                        help=f"velocity damping per step (default: from --resume, else {DEFAULTS['damping']})")
+    parser.add_argument("--spread", type=float, default=None,
+                        help=f"neighbour coupling (default: from --resume, else {DEFAULTS['spread']})")
+    parser.add_argument("--fall-speed", type=float, default=8.0, help="drop speed per step")
+    parser.add_argument("--energy-scale", type=float, default=0.2, help="fraction of kinetic energy given to the water")
+    parser.add_argument("--rain", type=float, default=0.0, help="rain drops per second instead of a single drop")
+    parser.add_argument("--rain-radius", type=float, nargs=2, default=[2.0, 6.0], metavar=("MIN", "MAX"),
+                        help="radius range of the rain drops")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the rain")
+    parser.add_argument("--workers", type=int, default=1, help="threads stepping the grid in row bands")
+    parser.add_argument("--solver", choices=["stencil", "spectral"], default="stencil",
+                        help="step the grid cell by cell, or jump ahead with the FFT propagator")
+    parser.add_argument("--boundary", choices=["free", "periodic"], default=None,
+                        help="grid edges (default: free; spectral is always periodic)")
+    parser.add_argument("--epsilon", type=float, default=0.0,
+                        help="stop stepping cells whose height and velocity stay below this (0: exact)")
+    parser.add_argument("--dtype", choices=list(DTYPES), default="float32",
+                        help="grid storage type (python wave_grid.py reports the accuracy of each)")
+    parser.add_argument("--sample-every", type=int, default=0, help="also save the height field every N steps")
+    parser.add_argument("--no-final", action="store_true", help="do not save the final height field")
+    parser.add_argument("--compress", action="store_true", help="write a compressed .npz")
+    parser.add_argument("--quiet", "-q", action="store_true", help="do not print a summary")
+    parser.add_argument("--resume", help="start from this snapshot instead of a still grid")
+    parser.add_argument("--checkpoint", help="write a snapshot of the final state here")
+    parser.add_argument("--output", "-o", required=True, help=".npz file to write")
+    args = parser.parse_args(argv)
+    if args.sample_every < 0:
+        parser.error("--sample-every must be >= 0")
+    if args.no_final and not args.sample_every:
+        parser.error("nothing to save: --no-final needs --sample-every")
+    if args.rain < 0:
+        parser.error("--rain must be >= 0")
+    if args.solver == "spectral" and args.boundary == "free":
+        parser.error("the spectral solver needs --boundary periodic")
+    args.boundary = args.boundary or ("periodic" if args.solver == "spectral" else "free")
+
+    state = {}
+    if args.resume:
+        arrays, state = read_snapshot(args.resume)
+        args.grid_size = arrays["water_y"].shape[0]
+    # Flags override the snapshot, so a resumed run can branch with new parameters
+    explicit = {name for name in DEFAULTS if getattr(args, name) is not None}
+    for name, default in DEFAULTS.items():
+        if name not in explicit:
+            setattr(args, name, state.get(STATE_FIELDS[name], default))
+    # Same limits as the input boxes
+    angle = args.angle = max(0.0, min(90.0, args.angle))
+    radius = args.size = max(5.0, min(100.0, args.size))
+    hit = state.get("drop_hit_water", False)
+    drop_x, drop_z = impact_cell(args.grid_size, angle, radius)
+    drop_y = DROP_HEIGHT
+    falling = bool(state.get("simulation_started", "drop_y" in state)) and not hit
+    if "drop_x" in state and (hit or falling):
+        # Continue the drop from where the snapshot left it (a new --angle or
+        # --size moves a drop that is still falling)
+        drop_y = state.get("drop_y", DROP_HEIGHT)
+        if hit or not explicit & {"angle", "size"}:
+            drop_x, drop_z = state["drop_x"], state["drop_z"]
+    if args.solver == "spectral":
+        grid = SpectralGrid(args.grid_size, args.spring_k, args.spread, args.damping, DTYPES[args.dtype])
+    else:
+        grid = WaveGrid(args.grid_size, args.spring_k, args.spread, args.damping, DTYPES[args.dtype], args.workers,
+                        boundary=args.boundary, epsilon=args.epsilon)
+    if args.resume:
+        grid.restore(arrays)
+    drops = DropManager(fall_speed=args.fall_speed, energy_scale=args.energy_scale, seed=args.seed)
+    if args.resume and "drops_x" in arrays:
+        drops.restore(arrays)
+    start = time.perf_counter()
+    if args.rain:
+        samples, sample_steps = simulate_rain(grid, drops, args.rain, args.steps, args.rain_radius, args.sample_every)
+        impact_step = 0 if hit else None
+    else:
+        samples, sample_steps, impact_step, drop_y = simulate(grid, angle, radius, args.steps, args.fall_speed,
+                                                              args.energy_scale, args.sample_every, hit,
+                                                              (drop_x, drop_z, drop_y))
+    elapsed = time.perf_counter() - start
+    grid.close()
+
+    if args.checkpoint:
+        # Same fields as Ripple_effect.py's snapshots, so either can load it
+        ripple_time = state.get("ripple_time", 0.0)
+        if impact_step is not None:
+            # ripple_time counts the impact step itself
+            ripple_time += args.steps - impact_step + 1 if impact_step else args.steps
+        write_snapshot(args.checkpoint, dict(grid.snapshot(), **drops.snapshot()), {
+            "grid_size": args.grid_size, "drop_x": drop_x, "drop_z": drop_z, "drop_y": drop_y,
+            "drop_vy": args.fall_speed if args.steps and not args.rain else state.get("drop_vy", 0.0),
+            "drop_radius": radius, "drop_angle": angle, "drop_hit_water": impact_step is not None,
+            "simulation_started": bool(state.get("simulation_started", False)) or not args.rain,
+            "ripple_time": ripple_time,
+            "spring_k": args.spring_k, "damping": args.damping, "spread": args.spread,
+        })
+
+    params = dict(vars(args), impact=(drop_x, drop_z))
+    arrays = {"params": np.array(json.dumps(params))}
+    if not args.no_final:
+        arrays["final"] = grid.water_y
+    if args.sample_every:
+        arrays["samples"] = samples
+        arrays["sample_steps"] = sample_steps
+    save = np.savez_compressed if args.compress else np.savez
+    save(args.output, **arrays)
+    if not args.quiet:
+        rate = args.steps / elapsed if elapsed > 0 else float("inf")
+        rain = f", {drops.impacts} rain drops" if args.rain else ""
+        print(f"{args.steps} steps of {args.grid_size}x{args.grid_size}{rain} in {elapsed:.3f}s "
+              f"({rate:.0f} steps/s) -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import numpy as np
+
+from drops import DropManager
+from droplet import DEFAULT_DROP_RADIUS, DROP_HEIGHT, DROP_MASS, IMPACT_HEIGHT, impact_energy
+from spectral import SpectralGrid
+from wave_grid import WaveGrid
+
+# ================
+# Simulation state
+# ================
+# Everything Ripple_effect.py's physics works on -- the water grid, the
+# Start drop, rain drops in flight, ripple_time and the parameters -- in one
+# object, so several independent simulations can live in one process. The
+# attributes are __slots__, which keeps instances small and turns a typo in
+# an attribute name into an error. Nothing here draws: step() returns the
+# drops that landed and the front end adds splashes or rings for them.
+#
+# With sleep_energy > 0 the water goes to sleep once its energy
+# (wave_grid.surface_energy, checked every SLEEP_CHECK_STEPS steps) drops
+# below that: the grid snaps to still water and is not stepped again until
+# something hits it, and also as soon as a WaveGrid with epsilon > 0 has
+# nothing left to step. Still water after reset() starts out asleep.
+
+SLEEP_CHECK_STEPS = 30
+
+
+class Simulation:
+    __slots__ = (
+        "grid", "drops", "size", "gravity", "fall_speed", "energy_scale",
+        "drop_x", "drop_z", "drop_y", "drop_vy", "drop_radius", "drop_angle", "drop_hit_water", "started",
+        "ripple_time", "steps", "rain_rate", "rain_radius", "steps_per_second",
+        "sleep_energy", "asleep", "awake_steps",
+    )
+
+    def __init__(self, size=120, spring_k=0.04, damping=0.985, spread=0.15, gravity=0.5, fall_speed=8.0,
+                 energy_scale=0.2, solver="stencil", boundary="free", workers=1, dtype=np.float32, seed=None,
+                 epsilon=0.0, sleep_energy=0.0):
+        if solver == "spectral":
+            self.grid = SpectralGrid(size, spring_k, spread, damping, dtype)
+        else:
+            self.grid = WaveGrid(size, spring_k, spread, damping, dtype, workers, boundary, epsilon=epsilon)
+        self.drops = DropManager(fall_speed=fall_speed, energy_scale=energy_scale, seed=seed)
+        self.size = size
+        self.gravity = gravity
+        self.fall_speed = fall_speed
+        self.energy_scale = energy_scale  # fraction of the drop's kinetic energy given to the water
+        self.drop_radius = DEFAULT_DROP_RADIUS
+        self.drop_angle = 45.0
+        self.started = False
+        self.steps = 0               # physics steps taken
+        self.rain_rate = 0.0         # rain drops per second, 0 = no rain
+        self.rain_radius = (2.0, 6.0)
+        self.steps_per_second = 120.0
+        self.sleep_energy = sleep_energy  # 0 = never sleep
+        self.reset()
+
+    # The grid owns the arrays and the spring parameters; these are views
+    @property
+    def water_y(self):
+        return self.grid.water_y
+
+    @property
+    def water_v(self):
+        return self.grid.water_v
+
+    @property
+    def water_a(self):
+        return self.grid.water_a
+
+    @property
+    def spring_k(self):
+        return self.grid.spring_k
+
+    @spring_k.setter
+    def spring_k(self, value):
+        self.grid.spring_k = value
+
+    @property
+    def damping(self):
+        return self.grid.damping
+
+    @damping.setter
+    def damping(self, value):
+        self.grid.damping = value
+
+    @property
+    def spread(self):
+        return self.grid.spread
+
+    @spread.setter
+    def spread(self, value):
+        self.grid.spread = value
+
+    def reset(self):
+        # Still water and the drop back at the top; radius and angle are kept
+        self.grid.reset()
+        self.drops.clear()
+        self.drop_x = self.size // 2
+        self.drop_z = self.size // 2
+        self.drop_y = DROP_HEIGHT
+        self.drop_vy = 0.0
+        self.drop_hit_water = False
+        self.ripple_time = 0.0
+        self.asleep = True
+        self.awake_steps = 0  # steps since the last energy check
+
+    def release(self, x, z, radius=None):
+        # Start a drop over cell (x, z) on still water
+        self.reset()
+        if radius is not None:
+            self.drop_radius = radius
+        self.drop_x, self.drop_z = x, z
+        self.started = True
+
+    def impact(self, x, z, radius, amount=None):
+        # Hit the water directly, by default as hard as a falling drop of this radius
+        if amount is None:
+            amount = impact_energy(radius, self.fall_speed, self.energy_scale)
+        self.grid.impact(x, z, radius, amount)
+        self.asleep = False
+
+    def energy(self):
+        # Energy in the water surface (see wave_grid.surface_energy)
+        return self.grid.energy()
+
+    def sleep(self):
+        # Snap to still water and stop stepping until the next impact
+        self.grid.reset()
+        self.asleep = True
+        self.awake_steps = 0
+
+    def close(self):
+        self.grid.close()
+
+    def step_drops(self):
+        # Start drop and rain for one step; returns the (x, z, radius) that landed
+        landed = []
+        if self.started and not self.drop_hit_water:
+            self.drop_vy = self.fall_speed
+            self.drop_y += self.drop_vy
+            if self.drop_y >= IMPACT_HEIGHT:
+                self.drop_hit_water = True
+                self.grid.impact(self.drop_x, self.drop_z, self.drop_radius,
+                                 impact_energy(self.drop_radius, self.drop_vy, self.energy_scale,
+                                               DEFAULT_DROP_RADIUS, DROP_MASS))
+                landed.append((self.drop_x, self.drop_z, self.drop_radius))
+        if self.rain_rate > 0:
+            self.drops.rain(self.rain_rate, 1.0 / self.steps_per_second, self.size, self.rain_radius)
+        x, z, radius = self.drops.update(self.grid)
+        landed.extend(zip(x.tolist(), z.tolist(), radius.tolist()))
+        if landed:
+            self.asleep = False
+        return landed
+
+    def falling(self):
+        # Anything that step_drops() still has to move
+        return (self.started and not self.drop_hit_water) or self.rain_rate > 0 or len(self.drops) > 0
+
+    def step_grid(self, n=1):
+        # n steps of the water alone (no drops), with the sleep checks
+        while n > 0:
+            if self.sleep_energy > 0 and not self.asleep:
+                count = min(n, SLEEP_CHECK_STEPS - self.awake_steps)
+            else:
+                count = n
+            if not self.asleep:
+                self.grid.step(count)
+                if self.sleep_energy > 0:
+                    self.awake_steps += count
+                    if getattr(self.grid, "active", ()) is None:
+                        # The grid found nothing above its epsilon and stopped stepping;
+                        # the quiet cells it left behind would keep the energy up
+                        self.sleep()
+                    elif self.awake_steps >= SLEEP_CHECK_STEPS:
+                        self.awake_steps = 0
+                        if self.grid.energy() < self.sleep_energy:
+                            self.sleep()
+            self.steps += count
+            self.ripple_time = self.ripple_time + count if self.drop_hit_water else 0.0
+            n -= count
+
+    def step(self, n=1):
+        # n physics steps (step_drops() then step_grid() each). Returns the
+        # drops that landed, the Start drop first.
+        landed = []
+        while n > 0 and self.falling():
+            landed += self.step_drops()
+            self.step_grid(1)
+            n -= 1
+        self.step_grid(n)  # nothing falling, the grid can take the rest at once
+        return landed
+
+    def snapshot(self):
+        # (arrays, state) for write_snapshot(); the arrays are views
+        arrays = dict(self.grid.snapshot(), **self.drops.snapshot())
+        state = {
+            "grid_size": self.size, "drop_x": self.drop_x, "drop_z": self.drop_z, "drop_y": self.drop_y,
+            "drop_vy": self.drop_vy, "drop_radius": self.drop_radius, "drop_angle": self.drop_angle,
+            "drop_hit_water": self.drop_hit_water, "simulation_started": self.started,
+            "ripple_time": self.ripple_time, "spring_k": self.spring_k, "damping": self.damping,
+            "spread": self.spread, "gravity": self.gravity, "rain_rate": self.rain_rate,
+        }
+        return arrays, state
+
+    def restore(self, arrays, state):
+        # Missing fields (e.g. in snapshots from simulate.py) keep their current value
+        if state.get("grid_size", self.size) != self.size:
+            raise ValueError(f"snapshot grid is {state['grid_size']}, this simulation uses {self.size}")
+        self.grid.restore(arrays)
+        self.asleep = False
+        self.awake_steps = 0
+        if "drops_x" in arrays:
+            self.drops.restore(arrays)
+        for name in ("drop_x", "drop_z", "drop_y", "drop_vy", "drop_radius", "drop_angle", "drop_hit_water",
+                     "ripple_time", "spring_k", "damping", "spread", "gravity", "rain_rate"):
+            setattr(self, name, state.get(name, getattr(self, name)))
+        self.started = state.get("simulation_started", self.started or self.drop_hit_water)
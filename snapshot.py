@@ -0,0 +1,82 @@
+import json
+import struct
+from collections import deque
+
+import numpy as np
+
+# ======================
+# Simulation snapshots
+# ======================
+# A snapshot is a set of named arrays (height, velocity, particles, ...) plus
+# a dict of plain scalars (droplet, ripple_time, parameters). On disk it is
+#   magic | header length (uint64) | JSON header | arrays, 64-byte aligned
+# where the header holds the scalars and each array's dtype, shape and file
+# offset. Arrays are stored raw, so loading can memory-map them instead of
+# reading the whole file.
+
+MAGIC = b"RSNAP\x00\x01\x00"
+ALIGN = 64
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_snapshot(path, arrays, state):
+    arrays = {name: np.ascontiguousarray(arr) for name, arr in arrays.items()}
+    # Offsets are relative to the first aligned byte after the header
+    layout, offset = {}, 0
+    for name, arr in arrays.items():
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset = _aligned(offset + arr.nbytes)
+    header = json.dumps({"state": state, "arrays": layout}).encode()
+    base = _aligned(len(MAGIC) + 8 + len(header))
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            f.seek(base + layout[name]["offset"])
+            f.write(arr.tobytes())
+
+
+def read_snapshot(path, mmap=True):
+    # Returns (arrays, state). With mmap the arrays are read-only views of the file.
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a simulation snapshot")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+        base = _aligned(len(MAGIC) + 8 + length)
+        arrays = {}
+        for name, entry in header["arrays"].items():
+            dtype, shape = np.dtype(entry["dtype"]), tuple(entry["shape"])
+            offset = base + entry["offset"]
+            count = int(np.prod(shape))
+            if count == 0:
+                arrays[name] = np.empty(shape, dtype)
+            elif mmap:
+                arrays[name] = np.memmap(path, dtype, "r", offset, shape)
+            else:
+                f.seek(offset)
+                arrays[name] = np.fromfile(f, dtype, count).reshape(shape)
+    return arrays, header["state"]
+
+
+class SnapshotRing:
+    # The last `capacity` snapshots in memory, newest last, for rewinding
+    def __init__(self, capacity=64):
+        self.snapshots = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def push(self, arrays, state):
+        self.snapshots.append(({name: np.array(arr) for name, arr in arrays.items()}, dict(state)))
+
+    def pop(self):
+        # Newest snapshot, removed so the next pop goes further back
+        return self.snapshots.pop() if self.snapshots else None
+
+    def clear(self):
+        self.snapshots.clear()
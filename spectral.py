@@ -0,0 +1,174 @@
+import argparse
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from wave_grid import ImpactKernels, WaveGrid, deposit, stamp, surface_energy
+
+# =========================
+# Spectral water propagator
+# =========================
+# The grid step (a = spread * laplacian(y) - spring_k * y; v = damping * (v + a);
+# y += v) is linear and the same for every cell, so on a periodic grid the
+# 2D Fourier modes evolve independently. For a mode whose Laplacian
+# eigenvalue is lam, c = spread * lam - spring_k and one step is
+#   [y]     [1 + d*c   d] [y]
+#   [v]  <- [  d*c     d] [v]        (d = damping)
+# n steps are that 2x2 matrix to the power n, computed in closed form from
+# its eigenvalues, so any number of steps costs two FFTs in and three out.
+# Whole step counts give the same result as WaveGrid(boundary="periodic")
+# up to rounding; fractional counts continue the motion smoothly in between.
+
+# Below this eigenvalue gap the closed form loses precision, use the
+# repeated-eigenvalue limit instead
+DEGENERATE_GAP = 1e-7
+
+
+def laplacian_eigenvalues(size):
+    # Eigenvalues of the periodic 5-point Laplacian on the rfft2 frequency grid
+    rows = 2 * np.cos(2 * np.pi * np.fft.fftfreq(size)) - 2
+    cols = 2 * np.cos(2 * np.pi * np.fft.rfftfreq(size)) - 2
+    return rows[:, None] + cols[None, :]
+
+
+def propagator(lam, spring_k, spread, damping, steps):
+    # Entries (m11, m12, m21, m22) of the per-mode step matrix to the power `steps`
+    c = spread * lam - spring_k
+    d = damping
+    trace = 1 + d * c + d
+    gap = np.sqrt(trace.astype(complex) ** 2 - 4 * d)
+    mu_p, mu_m = (trace + gap) / 2, (trace - gap) / 2
+    # M^n = s(n) M - det(M) s(n-1) I, with s(n) = (mu_p^n - mu_m^n) / (mu_p - mu_m)
+    degenerate = np.abs(gap) < DEGENERATE_GAP
+    safe_gap = np.where(degenerate, 1.0, gap)
+    s_n = np.where(degenerate, steps * mu_p ** (steps - 1), (mu_p ** steps - mu_m ** steps) / safe_gap)
+    s_prev = np.where(degenerate, (steps - 1) * mu_p ** (steps - 2),
+                      (mu_p ** (steps - 1) - mu_m ** (steps - 1)) / safe_gap)
+    det_s_prev = d * s_prev
+    return ((s_n * (1 + d * c) - det_s_prev).real, (s_n * d).real,
+            (s_n * d * c).real, (s_n * d - det_s_prev).real)
+
+
+class SpectralGrid:
+    # Drop-in for WaveGrid (periodic edges only) that advances by FFT
+    def __init__(self, size, spring_k=0.04, spread=0.15, damping=0.985, dtype=np.float32, max_propagators=8):
+        self.size = size
+        self.boundary = "periodic"
+        self.spring_k = spring_k
+        self.spread = spread
+        self.damping = damping
+        self.water_y = np.zeros((size, size), dtype=dtype)
+        self.water_v = np.zeros((size, size), dtype=dtype)
+        self.water_a = np.zeros((size, size), dtype=dtype)  # acceleration of the last step, as WaveGrid leaves it
+        self.kernels = ImpactKernels()
+        self.lam = laplacian_eigenvalues(size)
+        self.max_propagators = max_propagators
+        self.propagators = OrderedDict()
+
+    def reset(self):
+        self.water_y.fill(0.0)
+        self.water_v.fill(0.0)
+        self.water_a.fill(0.0)
+
+    def snapshot(self):
+        return {"water_y": self.water_y, "water_v": self.water_v, "water_a": self.water_a}
+
+    def restore(self, arrays):
+        for name, arr in self.snapshot().items():
+            np.copyto(arr, arrays[name], casting="same_kind")
+
+    def impact(self, x, z, radius, amount):
+        stamp(self.water_v, self.kernels.get(radius), int(x), int(z), amount)
+
+    def impact_many(self, xs, zs, radii, amounts):
+        deposit(self.water_v, self.kernels, xs, zs, radii, amounts)
+
+    def energy(self):
+        return surface_energy(self.water_y, self.water_v, self.spring_k, self.spread, periodic=True)
+
+    def set_workers(self, workers):
+        pass
+
+    def close(self):
+        pass
+
+    def get_propagator(self, steps):
+        # Cached per step count and parameters, since the sliders can change them
+        key = (steps, self.spring_k, self.spread, self.damping)
+        entry = self.propagators.get(key)
+        if entry is not None:
+            self.propagators.move_to_end(key)
+            return entry
+        entry = propagator(self.lam, self.spring_k, self.spread, self.damping, steps)
+        self.propagators[key] = entry
+        if len(self.propagators) > self.max_propagators:
+            self.propagators.popitem(last=False)
+        return entry
+
+    def step(self, steps=1):
+        # `steps` may be fractional; 0 leaves the state unchanged
+        if steps <= 0:
+            return
+        m11, m12, m21, m22 = self.get_propagator(steps)
+        y_hat = np.fft.rfft2(self.water_y)
+        v_hat = np.fft.rfft2(self.water_v)
+        y_new = m11 * y_hat + m12 * v_hat
+        v_new = m21 * y_hat + m22 * v_hat
+        shape = self.water_y.shape
+        self.water_y[...] = np.fft.irfft2(y_new, shape)
+        self.water_v[...] = np.fft.irfft2(v_new, shape)
+        # The last step's acceleration came from the height before it, y - v
+        c = self.spread * self.lam - self.spring_k
+        self.water_a[...] = np.fft.irfft2(c * (y_new - v_new), shape)
+
+    def advance_time(self, seconds, rate=120.0):
+        # Jump `seconds` ahead at `rate` physics steps per second
+        self.step(seconds * rate)
+
+
+def check(size=64, steps=600, spring_k=0.04, spread=0.15, damping=0.985, radius=12.0, amount=5.0):
+    # Same impact on both engines (periodic edges, float64); returns the
+    # largest height and velocity differences and the time each engine took
+    stencil = WaveGrid(size, spring_k, spread, damping, dtype=np.float64, boundary="periodic")
+    spectral = SpectralGrid(size, spring_k, spread, damping, dtype=np.float64)
+    for grid in (stencil, spectral):
+        grid.impact(size // 3, size // 2, radius, amount)
+    start = time.perf_counter()
+    stencil.step(steps)
+    stencil_time = time.perf_counter() - start
+    start = time.perf_counter()
+    spectral.step(steps)
+    spectral_time = time.perf_counter() - start
+    scale = max(np.abs(stencil.water_y).max(), 1e-300)
+    return {
+        "height_error": float(np.abs(stencil.water_y - spectral.water_y).max()),
+        "velocity_error": float(np.abs(stencil.water_v - spectral.water_v).max()),
+        "relative_error": float(np.abs(stencil.water_y - spectral.water_y).max() / scale),
+        "stencil_s": stencil_time,
+        "spectral_s": spectral_time,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the FFT propagator against the stencil engine.")
+    parser.add_argument("--grid-size", type=int, default=120, help="grid points per side")
+    parser.add_argument("--steps", type=int, default=600, help="physics steps to compare")
+    parser.add_argument("--spring-k", type=float, default=0.04, help="spring constant")
+    parser.add_argument("--damping", type=float, default=0.985, help="velocity damping per step")
+    parser.add_argument("--spread", type=float, default=0.15, help="neighbour coupling")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="largest relative height error accepted")
+    args = parser.parse_args(argv)
+    result = check(args.grid_size, args.steps, args.spring_k, args.spread, args.damping)
+    print(f"{args.steps} steps of {args.grid_size}x{args.grid_size}: max height error {result['height_error']:.3g} "
+          f"(relative {result['relative_error']:.3g}), max velocity error {result['velocity_error']:.3g}")
+    print(f"stencil {result['stencil_s'] * 1000:.1f} ms, spectral {result['spectral_s'] * 1000:.1f} ms")
+    if result["relative_error"] > args.tolerance:
+        print(f"FAILED: relative error above {args.tolerance:g}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import numpy as np
+
+# =======================
+# Splash particle system
+# =======================
+# Particles live in preallocated arrays (one array per attribute). Spawning
+# fills a batch at the end, updating integrates every live particle at once
+# and dead particles are compacted away so the live ones stay contiguous.
+# pygame is only imported by the drawing methods, so the simulation part
+# imports without it.
+
+
+class SplashParticles:
+    def __init__(self, capacity=65536, floor_y=400, gravity=0.1, bounce=-0.4, fade=0.04, max_life=1.6):
+        self.capacity = capacity
+        self.floor_y = floor_y    # particles moving down below this line bounce
+        self.gravity = gravity
+        self.bounce = bounce
+        self.fade = fade          # life lost per update
+        self.max_life = max_life
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.life = np.zeros(capacity)
+        self.size = np.zeros(capacity)
+        self.count = 0
+        self.disks = {}
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def snapshot(self):
+        # Views of the live particles (copy them to keep a snapshot around)
+        n = self.count
+        return {"particle_x": self.x[:n], "particle_y": self.y[:n], "particle_vx": self.vx[:n],
+                "particle_vy": self.vy[:n], "particle_life": self.life[:n], "particle_size": self.size[:n]}
+
+    def restore(self, arrays):
+        n = min(len(arrays["particle_x"]), self.capacity)
+        for arr, name in ((self.x, "particle_x"), (self.y, "particle_y"), (self.vx, "particle_vx"),
+                          (self.vy, "particle_vy"), (self.life, "particle_life"), (self.size, "particle_size")):
+            arr[:n] = arrays[name][:n]
+        self.count = n
+
+    def spawn(self, x, y, num_particles, speed, variation, spread):
+        # Extra particles beyond capacity are dropped
+        n = min(num_particles, self.capacity - self.count)
+        if n <= 0:
+            return 0
+        s = slice(self.count, self.count + n)
+        angle = np.random.uniform(0, 2 * np.pi, n)
+        speeds = np.random.uniform(speed * 0.7 * variation, speed * 1.3 * variation, n)
+        self.life[s] = np.random.uniform(0.6, self.max_life, n)
+        self.size[s] = np.random.uniform(2, 6, n)
+        self.x[s] = x + np.random.uniform(-spread / 2, spread / 2, n)
+        self.y[s] = y + np.random.uniform(-spread / 2, spread / 2, n)
+        self.vx[s] = speeds * np.cos(angle)
+        self.vy[s] = -speeds * np.sin(angle)
+        self.count += n
+        return n
+
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+        x, y, vx, vy, life = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n], self.life[:n]
+        x += vx
+        y += vy
+        vy += self.gravity
+        vy[(y > self.floor_y) & (vy > 0)] *= self.bounce
+        life -= self.fade
+
+        alive = life > 0
+        live = int(np.count_nonzero(alive))
+        if live < n:
+            for arr in (self.x, self.y, self.vx, self.vy, self.life, self.size):
+                arr[:live] = arr[:n][alive]
+            self.count = live
+
+    def bounds(self):
+        # Rect covering every live particle as drawn, or None when there are none
+        import pygame
+        n = self.count
+        if n == 0:
+            return None
+        px = self.x[:n].astype(int)
+        py = self.y[:n].astype(int)
+        r = int(self.size[:n].max()) + 1
+        left, top = int(px.min()) - r, int(py.min()) - r
+        return pygame.Rect(left, top, int(px.max()) + r - left + 1, int(py.max()) + r - top + 1)
+
+    def disk(self, radius):
+        # Pixel offsets covered by pygame.draw.circle for this radius
+        offsets = self.disks.get(radius)
+        if offsets is None:
+            import pygame
+            stencil = pygame.Surface((radius * 2 + 2, radius * 2 + 2))
+            pygame.draw.circle(stencil, (255, 255, 255), (radius + 1, radius + 1), radius)
+            dx, dy = np.nonzero(pygame.surfarray.array2d(stencil))
+            offsets = (dx - radius - 1, dy - radius - 1)
+            self.disks[radius] = offsets
+        return offsets
+
+    def draw(self, surface, color):
+        import pygame
+        n = self.count
+        if n == 0:
+            return
+        px = self.x[:n].astype(int)
+        py = self.y[:n].astype(int)
+        radii = self.size[:n].astype(int)
+        if surface.get_bytesize() not in (2, 4):
+            # pixels2d needs a 16 or 32 bit surface, draw one circle at a time otherwise
+            for cx, cy, r in zip(px.tolist(), py.tolist(), radii.tolist()):
+                pygame.draw.circle(surface, color, (cx, cy), r)
+            return
+        width, height = surface.get_size()
+        mapped = surface.map_rgb(color)
+        pixels = pygame.surfarray.pixels2d(surface)
+        for r in np.unique(radii).tolist():
+            if r <= 0:
+                continue
+            sel = radii == r
+            cx, cy = px[sel], py[sel]
+            dx, dy = self.disk(r)
+            # Disks fully on screen need no per-pixel bounds check
+            inner = (cx >= r + 1) & (cx < width - r - 1) & (cy >= r + 1) & (cy < height - r - 1)
+            pixels[(cx[inner, None] + dx).ravel(), (cy[inner, None] + dy).ravel()] = mapped
+            edge = ~inner
+            if edge.any():
+                xs = (cx[edge, None] + dx).ravel()
+                ys = (cy[edge, None] + dy).ravel()
+                inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+                pixels[xs[inside], ys[inside]] = mapped
+        del pixels
@@ -0,0 +1,129 @@
+import argparse
+import csv
+import itertools
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+from droplet import DEFAULT_DROP_RADIUS, impact_cell
+from simulation import Simulation
+from wave_grid import DTYPES
+
+# ================
+# Parameter sweeps
+# ================
+# Runs one headless impact per combination of drop angle, drop radius,
+# damping and spread on a pool of worker processes, and writes one CSV row
+# per case as soon as it finishes (so rows arrive out of order; the case
+# number says where each one belongs). Every case records
+#   peak_amplitude  largest |height| anywhere on the grid, and when it happened
+#   decay_time      when the largest |height| last exceeded --threshold
+#                   (0 if it never did, nan if it still does at the end)
+#   energy_<t>s     surface energy (wave_grid.surface_energy) at each checkpoint
+# Times are in simulated seconds at STEPS_PER_SECOND physics steps.
+
+STEPS_PER_SECOND = 120  # Ripple_effect.py's PHYSICS_HZ
+
+
+def parse_values(text):
+    # "a,b,c" or an inclusive range "start:stop:step"
+    if ":" in text:
+        start, stop, step = (float(v) for v in text.split(":"))
+        if step <= 0:
+            raise argparse.ArgumentTypeError(f"range step must be positive in {text!r}")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        return [round(start + i * step, 10) for i in range(max(count, 0))]
+    try:
+        return [float(v) for v in text.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected numbers or start:stop:step, got {text!r}")
+
+
+def run_case(case):
+    sim = Simulation(case["grid_size"], case["spring_k"], case["damping"], case["spread"],
+                     fall_speed=case["fall_speed"], energy_scale=case["energy_scale"], dtype=DTYPES[case["dtype"]])
+    # Same limits as the input boxes
+    angle = max(0.0, min(90.0, case["angle"]))
+    radius = max(5.0, min(100.0, case["radius"]))
+    sim.release(*impact_cell(sim.size, angle, radius), radius)
+    checkpoints = {max(1, round(t * STEPS_PER_SECOND)): t for t in case["checkpoints"]}
+    steps = max([case["steps"]] + list(checkpoints))
+    threshold = case["threshold"]
+    y = sim.water_y
+    peak, peak_step, last_above = 0.0, 0, 0
+    row = {"case": case["case"], "angle": angle, "radius": radius, "damping": case["damping"],
+           "spread": case["spread"]}
+    start = time.perf_counter()
+    for step in range(1, steps + 1):
+        sim.step()
+        amplitude = max(float(y.max()), -float(y.min()))
+        if amplitude > peak:
+            peak, peak_step = amplitude, step
+        if amplitude >= threshold:
+            last_above = step
+        if step in checkpoints:
+            row[f"energy_{checkpoints[step]:g}s"] = sim.energy()
+    sim.close()
+    row["peak_amplitude"] = peak
+    row["peak_time"] = peak_step / STEPS_PER_SECOND
+    row["decay_time"] = float("nan") if last_above == steps else last_above / STEPS_PER_SECOND
+    row["seconds"] = time.perf_counter() - start
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a grid of headless impacts in parallel and tabulate the response.")
+    parser.add_argument("--angle", type=parse_values, default=[45.0], help="drop angles, e.g. 0:90:15 or 0,45,90")
+    parser.add_argument("--size", type=parse_values, default=[DEFAULT_DROP_RADIUS], help="drop radii (5-100)")
+    parser.add_argument("--damping", type=parse_values, default=[0.985], help="velocity damping values")
+    parser.add_argument("--spread", type=parse_values, default=[0.15], help="neighbour coupling values")
+    parser.add_argument("--spring-k", type=float, default=0.04, help="spring constant")
+    parser.add_argument("--grid-size", type=int, default=120, help="grid points per side")
+    parser.add_argument("--fall-speed", type=float, default=8.0, help="drop speed per step")
+    parser.add_argument("--energy-scale", type=float, default=0.2, help="fraction of kinetic energy given to the water")
+    parser.add_argument("--dtype", choices=list(DTYPES), default="float32", help="grid storage type")
+    parser.add_argument("--duration", type=float, default=10.0, help="simulated seconds per case")
+    parser.add_argument("--threshold", type=float, default=0.01, help="amplitude counted as decayed")
+    parser.add_argument("--checkpoints", type=parse_values, default=[1.0, 2.0, 5.0],
+                        help="simulated seconds at which to record the energy")
+    parser.add_argument("--processes", "-j", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--quiet", "-q", action="store_true", help="do not print progress")
+    parser.add_argument("--output", "-o", help="CSV file to write (default: stdout)")
+    args = parser.parse_args(argv)
+    if args.duration <= 0 or args.processes <= 0:
+        parser.error("--duration and --processes must be positive")
+
+    common = {
+        "grid_size": args.grid_size, "spring_k": args.spring_k, "fall_speed": args.fall_speed,
+        "energy_scale": args.energy_scale, "dtype": args.dtype, "threshold": args.threshold, "checkpoints": args.checkpoints,
+        "steps": max(1, round(args.duration * STEPS_PER_SECOND)),
+    }
+    cases = [dict(common, case=i, angle=angle, radius=radius, damping=damping, spread=spread)
+             for i, (angle, radius, damping, spread)
+             in enumerate(itertools.product(args.angle, args.size, args.damping, args.spread))]
+    fields = (["case", "angle", "radius", "damping", "spread", "peak_amplitude", "peak_time", "decay_time"]
+              + [f"energy_{t:g}s" for t in args.checkpoints] + ["seconds"])
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.DictWriter(out, fields)
+    writer.writeheader()
+    start = time.perf_counter()
+    # Small chunks keep rows streaming while still amortizing the hand-off
+    chunksize = max(1, min(16, len(cases) // (args.processes * 8)))
+    try:
+        with multiprocessing.Pool(args.processes) as pool:
+            for done, row in enumerate(pool.imap_unordered(run_case, cases, chunksize), 1):
+                writer.writerow(row)
+                out.flush()
+                if not args.quiet and (done % 50 == 0 or done == len(cases)):
+                    elapsed = time.perf_counter() - start
+                    print(f"{done}/{len(cases)} cases, {elapsed:.1f}s ({done / elapsed:.1f} cases/s)", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from collections import OrderedDict
+
+# ==================
+# Rendered text cache
+# ==================
+# font.render() is expensive and most labels, values and units on screen are
+# the same from one frame to the next, so rendered Surfaces are kept in a
+# bounded LRU keyed by (font, text, colour). A value is only re-rendered when
+# its formatted string changes.
+
+
+class TextCache:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias, color):
+        # Same arguments as font.render(), plus the font
+        key = (font, text, antialias, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
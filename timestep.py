@@ -0,0 +1,48 @@
+import numpy as np
+
+# ====================
+# Fixed-timestep clock
+# ====================
+# Physics advances in fixed steps of 1/rate seconds no matter how fast frames
+# are rendered. Real frame time is collected in an accumulator and turned into
+# whole substeps; what is left over (alpha, 0..1) is used to interpolate
+# between the last two physics states when drawing. The number of substeps per
+# frame is capped so a slow frame cannot snowball into ever slower frames.
+
+
+class FixedTimestep:
+    def __init__(self, rate=120.0, max_substeps=8):
+        self.rate = rate
+        self.dt = 1.0 / rate
+        self.max_substeps = max_substeps
+        self.accumulator = 0.0
+        self.steps = 0           # total physics steps taken
+        self.dropped_time = 0.0  # frame time thrown away by the substep cap
+
+    def advance(self, frame_time):
+        self.accumulator += frame_time
+        substeps = int(self.accumulator // self.dt)
+        if substeps > self.max_substeps:
+            self.dropped_time += (substeps - self.max_substeps) * self.dt
+            substeps = self.max_substeps
+            self.accumulator %= self.dt
+        else:
+            self.accumulator -= substeps * self.dt
+        self.steps += substeps
+        return substeps
+
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.dt)
+
+    def interpolate(self, previous, current, out=None):
+        # previous + alpha * (current - previous), for scalars or arrays
+        if out is None:
+            return previous + self.alpha * (current - previous)
+        np.subtract(current, previous, out=out)
+        out *= self.alpha
+        out += previous
+        return out
+
+    def reset(self):
+        self.accumulator = 0.0
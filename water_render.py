@@ -0,0 +1,69 @@
+import numpy as np
+import pygame
+
+# ==========================
+# Bird's-eye height map view
+# ==========================
+# The whole colour field (height ramp + fake specular highlight) is computed
+# as arrays, written to a small grid-sized Surface in one go and then scaled
+# onto the screen with a single blit.
+
+
+def default_height_lut():
+    # Colour by height (blue for low, white for high), indexed by base 0..255
+    base = np.arange(256)
+    lut = np.empty((256, 3), dtype=np.uint8)
+    lut[:, 0] = base
+    lut[:, 1] = base
+    lut[:, 2] = np.minimum(255, 200 + base // 4)
+    return lut
+
+
+class HeightMapRenderer:
+    def __init__(self, grid_size, lut=None):
+        self.grid_size = grid_size
+        self.lut = default_height_lut() if lut is None else np.asarray(lut, dtype=np.uint8)
+        n = grid_size - 1  # last row/column is not drawn
+        self.surface = pygame.Surface((n, n))
+        self.rgb = np.empty((n, n, 3), dtype=np.uint8)
+        self.base = np.empty((n, n), dtype=np.float32)
+        self.spec = np.zeros((n, n), dtype=np.int16)
+        self.scaled = None
+
+    def set_lut(self, lut=None):
+        self.lut = default_height_lut() if lut is None else np.asarray(lut, dtype=np.uint8)
+
+    def color_field(self, water_y):
+        g = self.grid_size
+        n = g - 1
+        base = self.base
+        np.divide(water_y[:n, :n], 30.0, out=base)
+        base *= 80
+        np.trunc(base, out=base)
+        base += 80
+        np.clip(base, 0, 255, out=base)
+        rgb = self.rgb
+        np.take(self.lut, base.astype(np.uint8), axis=0, out=rgb)
+
+        # Fake specular highlight (bright spot follows highest slope facing 'light'),
+        # only for cells with a full set of neighbours inside the drawn area
+        if g > 4:
+            dx = (water_y[2:g - 1, 1:g - 2] - water_y[0:g - 3, 1:g - 2]) * 0.5
+            dz = (water_y[1:g - 2, 2:g - 1] - water_y[1:g - 2, 0:g - 3]) * 0.5
+            dot = np.clip(0.5 - 0.5 * (dx + dz), 0.0, 1.0)
+            spec = self.spec
+            spec[1:g - 2, 1:g - 2] = 80 * dot
+            lit = rgb[1:g - 2, 1:g - 2]
+            np.minimum(lit + spec[1:g - 2, 1:g - 2, None], 255, out=lit, casting="unsafe")
+        return rgb
+
+    def render(self, water_y, size):
+        # The scaled image, reused (and overwritten) by the next call
+        pygame.surfarray.blit_array(self.surface, self.color_field(water_y))
+        if self.scaled is None or self.scaled.get_size() != size:
+            self.scaled = pygame.Surface(size)
+        pygame.transform.scale(self.surface, size, self.scaled)
+        return self.scaled
+
+    def draw(self, screen, water_y, pos, size):
+        return screen.blit(self.render(water_y, size), pos)
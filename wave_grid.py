@@ -0,0 +1,410 @@
+import argparse
+import math
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# ======================
+# Spring-mass water grid
+# ======================
+# Every cell is pulled back to rest by spring_k and towards its four
+# neighbours by spread. Cells on the border simply have fewer neighbours
+# (free edges), exactly like the original per-cell loop in Ripple_effect.py.
+# With boundary="periodic" the grid wraps around instead (a torus), which is
+# what the FFT propagator in spectral.py solves exactly.
+#
+# Only the active region is stepped: a box around every cell that may be
+# moving. A disturbance travels at most one cell per step, so each step
+# grows the box by one cell; cells outside it are still and stepping them
+# would leave them still. Impacts add their footprint to the box. With
+# epsilon > 0 the box is also rescanned every ACTIVE_RESCAN_STEPS steps and
+# shrunk to the cells whose height or velocity exceeds epsilon, so dying
+# ripples stop costing time (the quiet cells keep their last, tiny values).
+# With epsilon = 0 the result is exactly that of stepping the whole grid.
+#
+# fused=True (the default) computes the acceleration as
+#   spread * (sum of the 4 neighbours) - (4 * spread + spring_k) * y
+# with a missing neighbour on a free edge read as the cell itself, which
+# adds nothing to neighbour - center. The neighbour sums are built in
+# water_a itself and turned into the acceleration in place, so it takes 6
+# passes over memory instead of 12 and no temporary or extra arrays (fused=False is the original
+# form with 5 temporaries per step, kept as the reference). integrate() is
+# unchanged: v += a, v *= damping and y += v stay 3 passes, since a NumPy
+# ufunc combines only two operands. A step over whole rows (the full grid,
+# the thread bands, a full-width active box) allocates nothing; a narrower
+# active box is a strided view, for which NumPy still allocates a small
+# fixed-size iteration buffer per operation. Storage can be float64,
+# float32 or float16 (DTYPES); python wave_grid.py reports what each costs
+# in accuracy against float64.
+
+# Bands thinner than this cost more in thread hand-off than they save
+MIN_BAND_ROWS = 64
+ACTIVE_RESCAN_STEPS = 16
+# Above this fraction of the grid, stepping everything is cheaper than slicing
+ACTIVE_FULL_FRACTION = 0.5
+# Below this many cells the per-step slicing overhead of a partial box costs
+# more than it saves, and the whole grid is stepped (the active box is still
+# tracked, so still water is not stepped at all)
+ACTIVE_MIN_CELLS = 256 * 256
+
+DTYPES = {"float64": np.float64, "float32": np.float32, "float16": np.float16}
+
+
+class ImpactKernels:
+    # Radial falloff stencils (1 - dist/(radius+1) inside the drop, 0 outside),
+    # keyed by drop radius. Least recently used radii are evicted so slider
+    # driven radius changes cannot grow the cache without limit.
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.kernels = OrderedDict()
+
+    def get(self, radius):
+        kernel = self.kernels.get(radius)
+        if kernel is not None:
+            self.kernels.move_to_end(radius)
+            return kernel
+        reach = int(math.floor(radius)) if radius > 0 else 0
+        offsets = np.arange(-reach, reach + 1, dtype=np.float64)
+        dist = np.sqrt(offsets[:, None] ** 2 + offsets[None, :] ** 2)
+        kernel = np.where(dist <= radius, 1 - dist / (radius + 1), 0.0)
+        self.kernels[radius] = kernel
+        if len(self.kernels) > self.max_entries:
+            self.kernels.popitem(last=False)
+        return kernel
+
+
+def stamp(field, kernel, cx, cz, amount):
+    # Add kernel * amount centred on cell (cx, cz), clipped to the field
+    reach = kernel.shape[0] // 2
+    rows, cols = field.shape
+    i0, i1 = max(0, cx - reach), min(rows, cx + reach + 1)
+    j0, j1 = max(0, cz - reach), min(cols, cz + reach + 1)
+    if i0 >= i1 or j0 >= j1:
+        return None
+    field[i0:i1, j0:j1] += kernel[i0 - cx + reach:i1 - cx + reach, j0 - cz + reach:j1 - cz + reach] * amount
+    return i0, i1, j0, j1
+
+
+def deposit(field, kernels, xs, zs, radii, amounts):
+    # stamp() for many impacts at once: one scatter-add per distinct radius.
+    # Returns the box covering every touched cell (None if none was).
+    xs = np.asarray(xs).astype(int)
+    zs = np.asarray(zs).astype(int)
+    radii = np.asarray(radii, dtype=np.float64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    rows, cols = field.shape
+    flat = field.reshape(-1)
+    box = None
+    for radius in np.unique(radii).tolist():
+        sel = radii == radius
+        kernel = kernels.get(radius)
+        reach = kernel.shape[0] // 2
+        di, dj = np.nonzero(kernel)
+        i = xs[sel, None] + (di - reach)
+        j = zs[sel, None] + (dj - reach)
+        values = amounts[sel, None] * kernel[di, dj]
+        inside = (i >= 0) & (i < rows) & (j >= 0) & (j < cols)
+        i, j = i[inside], j[inside]
+        if len(i) == 0:
+            continue
+        np.add.at(flat, i * cols + j, values[inside].astype(field.dtype))
+        box = union_box(box, (int(i.min()), int(i.max()) + 1, int(j.min()), int(j.max()) + 1))
+    return box
+
+
+def union_box(a, b):
+    # Smallest (r0, r1, c0, c1) box covering both; None is the empty box
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+
+
+def surface_energy(y, v, spring_k, spread, periodic=False):
+    # Kinetic + spring + neighbour coupling energy of the surface (unit mass
+    # per cell), summed in float64. Zero only for still, flat water.
+    y = y.astype(np.float64)
+    v = v.astype(np.float64)
+    dx = np.diff(y, axis=0)
+    dz = np.diff(y, axis=1)
+    coupling = np.vdot(dx, dx) + np.vdot(dz, dz)
+    if periodic:
+        wrap_x = y[0, :] - y[-1, :]
+        wrap_z = y[:, 0] - y[:, -1]
+        coupling += np.vdot(wrap_x, wrap_x) + np.vdot(wrap_z, wrap_z)
+    return 0.5 * (np.vdot(v, v) + spring_k * np.vdot(y, y) + spread * coupling)
+
+
+class WaveGrid:
+    def __init__(self, size, spring_k=0.04, spread=0.15, damping=0.985, dtype=np.float32, workers=1, boundary="free",
+                 track_active=True, epsilon=0.0, fused=True):
+        if boundary not in ("free", "periodic"):
+            raise ValueError(f"unknown boundary {boundary!r}")
+        self.size = size
+        self.boundary = boundary
+        self.spring_k = spring_k  # spring constant
+        self.spread = spread      # how much neighboring points affect each other
+        self.damping = damping    # damping factor (viscosity)
+        self.water_y = np.zeros((size, size), dtype=dtype)  # displacement (height)
+        self.water_v = np.zeros((size, size), dtype=dtype)  # velocity
+        self.water_a = np.zeros((size, size), dtype=dtype)  # acceleration
+        self.fused = fused
+        self.kernels = ImpactKernels()
+        self.track_active = track_active  # False: always step the whole grid
+        self.epsilon = epsilon            # height/velocity that counts as still
+        self.active = None                # (r0, r1, c0, c1) of the cells that may move, None = all still
+        self.active_steps = 0             # steps since the active box was last rescanned
+        self.pool = None
+        self.set_workers(workers)
+
+    def reset(self):
+        self.water_y.fill(0.0)
+        self.water_v.fill(0.0)
+        self.water_a.fill(0.0)
+        self.active = None
+
+    def snapshot(self):
+        # Views of the state arrays (copy them to keep a snapshot around)
+        return {"water_y": self.water_y, "water_v": self.water_v, "water_a": self.water_a}
+
+    def restore(self, arrays):
+        # Copied in place, so outside references to the arrays stay valid
+        for name, arr in self.snapshot().items():
+            np.copyto(arr, arrays[name], casting="same_kind")
+        self.active = self.full_box()  # unknown contents, the next rescan narrows it
+
+    def impact(self, x, z, radius, amount):
+        # Deposit a drop's energy into the velocity field around cell (x, z)
+        self.active = union_box(self.active, stamp(self.water_v, self.kernels.get(radius), int(x), int(z), amount))
+
+    def impact_many(self, xs, zs, radii, amounts):
+        # Several drops landing in the same step, deposited together
+        self.active = union_box(self.active, deposit(self.water_v, self.kernels, xs, zs, radii, amounts))
+
+    def full_box(self):
+        rows, cols = self.water_y.shape
+        return 0, rows, 0, cols
+
+    def grow(self, box, steps=1):
+        # Cells `steps` steps can reach from the box: one more on every side per
+        # step. On a periodic grid a box touching an edge also reaches the opposite one.
+        rows, cols = self.water_y.shape
+        r0, r1 = max(0, box[0] - steps), min(rows, box[1] + steps)
+        c0, c1 = max(0, box[2] - steps), min(cols, box[3] + steps)
+        if self.boundary == "periodic":
+            if r0 == 0 or r1 == rows:
+                r0, r1 = 0, rows
+            if c0 == 0 or c1 == cols:
+                c0, c1 = 0, cols
+        return r0, r1, c0, c1
+
+    def rescan(self):
+        # Shrink the active box to the cells above epsilon
+        r0, r1, c0, c1 = self.active
+        eps = self.epsilon
+        y, v = self.water_y[r0:r1, c0:c1], self.water_v[r0:r1, c0:c1]
+        moving = (np.abs(y) > eps) | (np.abs(v) > eps)
+        rows = np.flatnonzero(moving.any(axis=1))
+        if len(rows) == 0:
+            self.active = None
+            return
+        cols = np.flatnonzero(moving.any(axis=0))
+        self.active = (r0 + int(rows[0]), r0 + int(rows[-1]) + 1, c0 + int(cols[0]), c0 + int(cols[-1]) + 1)
+
+    def energy(self):
+        return surface_energy(self.water_y, self.water_v, self.spring_k, self.spread, self.boundary == "periodic")
+
+    def compute_acceleration(self, r0=0, r1=None, c0=0, c1=None):
+        # Rows r0..r1 and columns c0..c1 only; neighbouring cells outside are read as halo
+        y, a = self.water_y, self.water_a
+        rows, cols = y.shape
+        if r1 is None:
+            r1 = rows
+        if c1 is None:
+            c1 = cols
+        if self.fused:
+            return self.fused_acceleration(r0, r1, c0, c1)
+        yb, ab = y[r0:r1, c0:c1], a[r0:r1, c0:c1]
+        # Sum of (neighbour - center) over in-bounds neighbours, one axis/direction at a time
+        ab.fill(0.0)
+        lo, hi = max(r0, 1), min(r1, rows - 1)
+        a[lo:r1, c0:c1] += y[lo - 1:r1 - 1, c0:c1] - y[lo:r1, c0:c1]
+        a[r0:hi, c0:c1] += y[r0 + 1:hi + 1, c0:c1] - y[r0:hi, c0:c1]
+        lo, hi = max(c0, 1), min(c1, cols - 1)
+        a[r0:r1, lo:c1] += y[r0:r1, lo - 1:c1 - 1] - y[r0:r1, lo:c1]
+        a[r0:r1, c0:hi] += y[r0:r1, c0 + 1:hi + 1] - y[r0:r1, c0:hi]
+        if self.boundary == "periodic":
+            # The missing neighbours of the border cells are on the opposite side
+            if r0 == 0:
+                a[0, c0:c1] += y[-1, c0:c1] - y[0, c0:c1]
+            if r1 == rows:
+                a[-1, c0:c1] += y[0, c0:c1] - y[-1, c0:c1]
+            if c0 == 0:
+                a[r0:r1, 0] += y[r0:r1, -1] - y[r0:r1, 0]
+            if c1 == cols:
+                a[r0:r1, -1] += y[r0:r1, 0] - y[r0:r1, -1]
+        ab *= self.spread
+        ab -= self.spring_k * yb
+        return a
+
+    def fused_acceleration(self, r0, r1, c0, c1):
+        y, a = self.water_y, self.water_a
+        rows, cols = y.shape
+        periodic = self.boundary == "periodic"
+        add = np.add
+        # The neighbour sums go into water_a itself, then become the acceleration.
+        # West + east in one pass. Full rows are one contiguous run of memory
+        # (strided 2D slices would make NumPy allocate an iteration buffer);
+        # there the first and last column pick up the neighbouring row's end
+        # and are overwritten just below.
+        if c0 == 0 and c1 == cols:
+            yf, af = y.reshape(-1), a.reshape(-1)
+            i0, i1 = r0 * cols, r1 * cols
+            add(yf[i0:i1 - 2], yf[i0 + 2:i1], out=af[i0 + 1:i1 - 1])
+        else:
+            lo, hi = max(c0, 1), min(c1, cols - 1)
+            add(y[r0:r1, lo - 1:hi - 1], y[r0:r1, lo + 1:hi + 1], out=a[r0:r1, lo:hi])
+        if c0 == 0:
+            add(y[r0:r1, -1 if periodic else 0], y[r0:r1, 1], out=a[r0:r1, 0])
+        if c1 == cols:
+            add(y[r0:r1, -2], y[r0:r1, 0 if periodic else -1], out=a[r0:r1, -1])
+        # North, then south
+        lo, hi = max(r0, 1), min(r1, rows - 1)
+        add(a[lo:r1, c0:c1], y[lo - 1:r1 - 1, c0:c1], out=a[lo:r1, c0:c1])
+        if r0 == 0:
+            add(a[0, c0:c1], y[-1 if periodic else 0, c0:c1], out=a[0, c0:c1])
+        add(a[r0:hi, c0:c1], y[r0 + 1:hi + 1, c0:c1], out=a[r0:hi, c0:c1])
+        if r1 == rows:
+            add(a[-1, c0:c1], y[0 if periodic else -1, c0:c1], out=a[-1, c0:c1])
+        ab = a[r0:r1, c0:c1]
+        c = 4 * self.spread + self.spring_k
+        if c == 0:
+            np.multiply(ab, self.spread, out=ab)
+        else:
+            # spread * sums - c * y, as c * ((spread / c) * sums - y) to stay in place
+            np.multiply(ab, self.spread / c, out=ab)
+            np.subtract(ab, y[r0:r1, c0:c1], out=ab)
+            np.multiply(ab, c, out=ab)
+        return a
+
+    def integrate(self, r0=0, r1=None, c0=0, c1=None):
+        # Three passes: NumPy cannot do v = damping * (v + a) in one
+        v, y = self.water_v[r0:r1, c0:c1], self.water_y[r0:r1, c0:c1]
+        v += self.water_a[r0:r1, c0:c1]
+        v *= self.damping
+        y += v
+
+    def set_workers(self, workers):
+        # Number of threads stepping row bands (1 = single-threaded)
+        self.close()
+        self.workers = max(1, int(workers))
+        bands = min(self.workers, self.water_y.shape[0] // MIN_BAND_ROWS)
+        edges = np.linspace(0, self.water_y.shape[0], max(1, bands) + 1).astype(int)
+        self.bands = list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+        if len(self.bands) > 1:
+            self.pool = ThreadPoolExecutor(max_workers=len(self.bands), thread_name_prefix="wave-grid")
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def step(self, steps=1):
+        if not self.track_active:
+            self.step_all(steps)
+            return
+        full = self.full_box()
+        while steps > 0:
+            if self.active is None:
+                return  # still water stays still
+            if self.epsilon > 0 and self.active_steps >= ACTIVE_RESCAN_STEPS:
+                self.active_steps = 0
+                self.rescan()
+                if self.active is None:
+                    return
+            region = self.grow(self.active)
+            cells = full[1] * full[3]
+            area = (region[1] - region[0]) * (region[3] - region[2])
+            if cells < ACTIVE_MIN_CELLS or area >= ACTIVE_FULL_FRACTION * cells:
+                # Whole grid (the still cells stay still) until the next rescan is due
+                n = steps if self.epsilon <= 0 else min(steps, ACTIVE_RESCAN_STEPS - self.active_steps)
+                self.step_all(n)
+                region = self.grow(self.active, n)
+            else:
+                n = 1
+                self.compute_acceleration(*region)
+                self.integrate(*region)
+            self.active = region
+            self.active_steps += n
+            steps -= n
+
+    def step_all(self, steps):
+        # Every cell, `steps` times (in row bands when there is a pool)
+        if self.pool is None:
+            for _ in range(steps):
+                self.compute_acceleration()
+                self.integrate()
+            return
+        # Every band has to finish reading its halo rows before any band moves
+        # water_y, so each step is two passes over the bands. NumPy drops the GIL
+        # inside the array operations, which lets the bands run in parallel.
+        for _ in range(steps):
+            for _ in self.pool.map(lambda band: self.compute_acceleration(*band), self.bands):
+                pass
+            for _ in self.pool.map(lambda band: self.integrate(*band), self.bands):
+                pass
+
+
+def check_precision(size=120, steps=600, dtypes=tuple(DTYPES), spring_k=0.04, spread=0.15, damping=0.985,
+                    radius=18.0, amount=12.8):
+    # The same impact, stepped (fused, whole grid) with each storage type and
+    # compared against the original step in float64. One row per dtype.
+    def run(dtype, fused):
+        grid = WaveGrid(size, spring_k, spread, damping, dtype, track_active=False, fused=fused)
+        grid.impact(size // 2, size // 2, radius, amount)
+        start = time.perf_counter()
+        grid.step(steps)
+        return grid, time.perf_counter() - start
+
+    reference, _ = run(np.float64, False)
+    scale = max(np.abs(reference.water_y).max(), 1e-300)
+    reference_energy = reference.energy()
+    rows = []
+    for name in dtypes:
+        grid, seconds = run(DTYPES[name], True)
+        error = float(np.abs(grid.water_y.astype(np.float64) - reference.water_y).max())
+        rows.append({
+            "dtype": name,
+            "bytes_per_cell": 3 * grid.water_y.itemsize,  # y, v and a
+            "height_error": error,
+            "relative_error": error / scale,
+            "energy_ratio": grid.energy() / reference_energy if reference_energy > 0 else float("nan"),
+            "ms_per_step": seconds / steps * 1000,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the accuracy and speed of each grid storage type.")
+    parser.add_argument("--grid-size", type=int, default=120, help="grid points per side")
+    parser.add_argument("--steps", type=int, default=600, help="physics steps to compare")
+    parser.add_argument("--dtype", nargs="+", choices=list(DTYPES), default=list(DTYPES), help="storage types")
+    parser.add_argument("--spring-k", type=float, default=0.04, help="spring constant")
+    parser.add_argument("--damping", type=float, default=0.985, help="velocity damping per step")
+    parser.add_argument("--spread", type=float, default=0.15, help="neighbour coupling")
+    args = parser.parse_args(argv)
+    rows = check_precision(args.grid_size, args.steps, args.dtype, args.spring_k, args.spread, args.damping)
+    print(f"{args.steps} steps of {args.grid_size}x{args.grid_size} against the unfused float64 step:")
+    print(f"{'dtype':<8} {'bytes/cell':>10} {'max error':>10} {'relative':>10} {'energy':>8} {'ms/step':>8}")
+    for row in rows:
+        print(f"{row['dtype']:<8} {row['bytes_per_cell']:>10} {row['height_error']:>10.3g} "
+              f"{row['relative_error']:>10.3g} {row['energy_ratio']:>8.4f} {row['ms_per_step']:>8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import pygame
+
+# ====================
+# Retained-mode widgets
+# ====================
+# Buttons, sliders and input boxes keep a pre-rendered surface per visual
+# state and only render again when that state changes, so drawing the UI is
+# one blit per widget. Hit-testing and slider dragging go through the same
+# objects that draw them.
+
+
+class Button:
+    def __init__(self, rect, label, font, color, hover_color, text_color, border_radius=12, shadow=True):
+        self.rect = pygame.Rect(rect)
+        self.label = label
+        self.font = font
+        self.colors = {"normal": color, "hover": hover_color}
+        self.text_color = text_color
+        self.border_radius = border_radius
+        self.shadow = shadow
+        self.hovered = False
+        self.surfaces = {}  # state -> surface, rendered on first use
+
+    def collidepoint(self, pos):
+        return self.rect.collidepoint(pos)
+
+    def hover(self, pos):
+        self.hovered = self.rect.collidepoint(pos)
+        return self.hovered
+
+    @property
+    def state(self):
+        return "hover" if self.hovered else "normal"
+
+    def render(self, state):
+        # Drop shadow offset by (4, 4) under the rounded button, label centered
+        w, h = self.rect.size
+        surface = pygame.Surface((w + 8, h + 8), pygame.SRCALPHA)
+        if self.shadow:
+            pygame.draw.rect(surface, (0, 0, 0, 60), (4, 4, w, h), border_radius=self.border_radius)
+        body = pygame.Rect(4, 4, w, h)
+        pygame.draw.rect(surface, self.colors[state], body, border_radius=self.border_radius)
+        text = self.font.render(self.label, True, self.text_color)
+        surface.blit(text, text.get_rect(center=body.center))
+        return surface
+
+    def draw(self, surface):
+        state = self.state
+        image = self.surfaces.get(state)
+        if image is None:
+            image = self.surfaces[state] = self.render(state)
+        return surface.blit(image, (self.rect.x - 4, self.rect.y - 4))
+
+
+class Slider:
+    def __init__(self, label, minv, maxv, font, width=180, height=8, knob_radius=10,
+                 track_color=(40, 40, 60), fill_color=(120, 180, 255), knob_color=(200, 220, 255),
+                 text_color=(220, 220, 220), inverted=False):
+        self.label = label
+        self.minv = minv
+        self.maxv = maxv
+        self.font = font
+        self.width = width
+        self.height = height
+        self.knob_radius = knob_radius
+        self.track_color = track_color
+        self.fill_color = fill_color
+        self.knob_color = knob_color
+        self.text_color = text_color
+        self.inverted = inverted  # dragging right lowers the value
+        self.track = pygame.Rect(0, 0, width, height)
+        self.key = None      # (knob position, label text) of the cached surface
+        self.image = None
+        self.label_height = 25  # label sits this far above the track
+
+    def place(self, x, y):
+        # Position of the track's top-left corner
+        self.track.topleft = (x, y)
+
+    def collidepoint(self, pos):
+        # Track bounds, inclusive on every side
+        x, y = pos
+        return (self.track.left <= x <= self.track.right
+                and self.track.top <= y <= self.track.bottom)
+
+    def drag(self, pos):
+        # New value for a mouse held down at pos, or None when not on the track
+        if not self.collidepoint(pos):
+            return None
+        t = (pos[0] - self.track.x) / self.width
+        if self.inverted:
+            return self.maxv - t * (self.maxv - self.minv)
+        return self.minv + t * (self.maxv - self.minv)
+
+    def render(self, knob, text):
+        # Label above the track, track + fill up to the knob, knob on top;
+        # the surface reaches knob_radius left of the track for the knob at 0
+        r = self.knob_radius
+        label = self.font.render(text, True, self.text_color)
+        width = r + max(label.get_width(), self.width + r + 1)
+        height = self.label_height + max(self.height, self.height // 2 + r + 1)
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.blit(label, (r, 0))
+        track = pygame.Rect(r, self.label_height, self.width, self.height)
+        pygame.draw.rect(surface, (0, 0, 0, 60), track, border_radius=8)
+        pygame.draw.rect(surface, self.track_color, track, border_radius=8)
+        pygame.draw.rect(surface, self.fill_color, (r, track.y, knob, self.height), border_radius=8)
+        pygame.draw.circle(surface, self.knob_color, (r + knob, track.centery), r)
+        return surface
+
+    def draw(self, surface, value):
+        knob = int((value - self.minv) / (self.maxv - self.minv) * self.width)
+        key = (knob, f"{self.label}: {value:.3f}")
+        if key != self.key:
+            self.key = key
+            self.image = self.render(*key)
+        return surface.blit(self.image, (self.track.x - self.knob_radius, self.track.y - self.label_height))
+
+
+class InputBox:
+    def __init__(self, rect, placeholder, font, text_color, placeholder_color, color, active_color,
+                 allowed="0123456789."):
+        self.rect = pygame.Rect(rect)
+        self.placeholder = placeholder
+        self.font = font
+        self.text_color = text_color
+        self.placeholder_color = placeholder_color
+        self.colors = {False: color, True: active_color}
+        self.allowed = allowed
+        self.text = ""
+        self.key = None   # (active, text) of the cached surface
+        self.image = None
+
+    def collidepoint(self, pos):
+        return self.rect.collidepoint(pos)
+
+    def handle_key(self, event):
+        if event.key == pygame.K_BACKSPACE:
+            self.text = self.text[:-1]
+        elif event.unicode and event.unicode in self.allowed:
+            self.text += event.unicode
+
+    def render(self, active, text):
+        # Rounded outline only, so the panel shows through
+        surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        pygame.draw.rect(surface, self.colors[active], surface.get_rect(), 2, border_radius=4)
+        if text:
+            rendered = self.font.render(text, True, self.text_color)
+        else:
+            rendered = self.font.render(self.placeholder, True, self.placeholder_color)
+        surface.blit(rendered, (5, 5))
+        return surface
+
+    def draw(self, surface, active):
+        key = (active, self.text)
+        if key != self.key:
+            self.key = key
+            self.image = self.render(*key)
+        return surface.blit(self.image, self.rect)